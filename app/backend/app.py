@@ -739,6 +739,14 @@ async def close_clients():
     await current_app.config[CONFIG_BLOB_CONTAINER_CLIENT].close()
     if current_app.config.get(CONFIG_USER_BLOB_CONTAINER_CLIENT):
         await current_app.config[CONFIG_USER_BLOB_CONTAINER_CLIENT].close()
+    for approach_config in (
+        CONFIG_ASK_APPROACH,
+        CONFIG_CHAT_APPROACH,
+        CONFIG_ASK_VISION_APPROACH,
+        CONFIG_CHAT_VISION_APPROACH,
+    ):
+        if approach := current_app.config.get(approach_config):
+            await approach.close()
 
 
 def create_app():
@@ -1,21 +1,31 @@
+import asyncio
+import json
 import logging
 import os
+import re
+import sys
+import time
 from abc import ABC
+from collections import OrderedDict
 from dataclasses import dataclass, field 
 from typing import (
     Any,
     AsyncGenerator,
+    AsyncIterator,
     Awaitable,
     Callable,
     List,
     Optional,
+    Sequence,
     TypedDict,
+    TypeVar,
     cast,
 )
 
 import urllib.parse
 
 import aiohttp
+import jwt
 from azure.search.documents.aio import SearchClient
 from azure.search.documents.models import (
     QueryCaptionResult,
@@ -28,10 +38,64 @@ from openai.types.chat import ChatCompletionMessageParam
 
 from approaches.promptmanager import PromptManager
 from core.authentication import AuthenticationHelper
+from core.embeddingbatcher import EmbeddingBatcher
+from core.semanticcache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Maximum number of query embeddings kept in memory per approach instance
+EMBEDDING_CACHE_SIZE = 1024
+# Vision tokens are refreshed this many seconds before they expire
+VISION_TOKEN_REFRESH_MARGIN = 60
+# Lifetime assumed for vision tokens whose expiry can't be read from the token itself
+VISION_TOKEN_FALLBACK_TTL = 300
+
+# Default limits on concurrent calls per approach instance, overridable with
+# the SEARCH_MAX_CONCURRENCY and EMBEDDING_MAX_CONCURRENCY environment variables
+DEFAULT_SEARCH_MAX_CONCURRENCY = 32
+DEFAULT_EMBEDDING_MAX_CONCURRENCY = 32
+
+# Default lifetime in seconds and minimum cosine similarity of cached search results, overridable with the
+# SEARCH_RESULTS_CACHE_TTL and SEARCH_RESULTS_CACHE_THRESHOLD environment variables. A TTL of 0 disables the cache
+DEFAULT_SEARCH_RESULTS_CACHE_TTL = 300
+DEFAULT_SEARCH_RESULTS_CACHE_THRESHOLD = 0.95
+
+# Embedding models that accept a custom number of output dimensions
+DIMENSIONS_SUPPORTED_MODELS = frozenset({"text-embedding-3-small", "text-embedding-3-large"})
+
+
+class ExtraArgs(TypedDict, total=False):
+    dimensions: int
+
+
+# Page images are named <document>-<page number>.png
+PNG_PAGE_PATTERN = re.compile(r"(.*)-(\d+)\.png\Z", re.IGNORECASE | re.DOTALL)
+
+# Used to flatten source content onto a single line in one pass
+NEWLINES_TO_SPACES = str.maketrans({"\n": " ", "\r": " "})
+
+# Slotted dataclasses avoid a per-instance __dict__, but slots=True needs Python 3.10+
+DATACLASS_SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+T = TypeVar("T")
+
+
+async def prefetch_pages(pages: AsyncIterator[T]) -> AsyncGenerator[T, None]:
+    """Yields pages while the next one is already being fetched, so network I/O overlaps page processing."""
+    next_page: asyncio.Future[T] = asyncio.ensure_future(pages.__anext__())
+    try:
+        while True:
+            try:
+                page = await next_page
+            except StopAsyncIteration:
+                return
+            next_page = asyncio.ensure_future(pages.__anext__())
+            yield page
+    finally:
+        next_page.cancel()
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Document:
     id: Optional[str]
     content: Optional[str]
@@ -47,12 +111,13 @@ class Document:
     score: Optional[float] = None
     reranker_score: Optional[float] = None
 
-    def serialize_for_results(self) -> dict[str, Any]:
+    def serialize_for_results(self, include_embedding_preview: bool = True) -> dict[str, Any]:
+        # Embedding previews are only useful when debugging, so callers can skip formatting them
         return {
             "id": self.id,
             "content": self.content,
-            "embedding": Document.trim_embedding(self.embedding),
-            "imageEmbedding": Document.trim_embedding(self.image_embedding),
+            "embedding": Document.trim_embedding(self.embedding) if include_embedding_preview else None,
+            "imageEmbedding": Document.trim_embedding(self.image_embedding) if include_embedding_preview else None,
             "category": self.category,
             "sourcepage": self.sourcepage,
             "sourcefile": self.sourcefile,
@@ -88,7 +153,7 @@ class Document:
         return None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ThoughtStep:
     title: str
     description: Optional[Any]
@@ -101,6 +166,17 @@ class Approach(ABC):
     # Useful for using local small language models, for example
     ALLOW_NON_GPT_MODELS = True
 
+    # Subclasses don't call Approach.__init__, so per-instance state is created lazily on first use
+    _embedding_cache: Optional["OrderedDict[tuple[str, int, str], List[float]]"] = None
+    _search_results_cache: Optional[SemanticCache[List[Document]]] = None
+    _search_results_cache_configured = False
+    _embedding_batchers: Optional[dict[tuple[str, int], EmbeddingBatcher]] = None
+    _http_session: Optional[aiohttp.ClientSession] = None
+    _vision_token: Optional[tuple[str, float]] = None
+    _vision_token_lock: Optional[asyncio.Lock] = None
+    _search_semaphore: Optional[asyncio.Semaphore] = None
+    _embedding_semaphore: Optional[asyncio.Semaphore] = None
+
     def __init__(
         self,
         search_client: SearchClient,
@@ -135,6 +211,9 @@ class Approach(ABC):
         include_category = overrides.get("include_category")
         exclude_category = overrides.get("exclude_category")
         security_filter = self.auth_helper.build_security_filters(overrides, auth_claims)
+        if not include_category and not exclude_category:
+            # Most queries have no category filter, so at most the security filter applies
+            return security_filter or None
         filters = []
         if include_category:
             filters.append("category eq '{}'".format(include_category.replace("'", "''")))
@@ -142,7 +221,7 @@ class Approach(ABC):
             filters.append("category ne '{}'".format(exclude_category.replace("'", "''")))
         if security_filter:
             filters.append(security_filter)
-        return None if len(filters) == 0 else " and ".join(filters)
+        return " and ".join(filters)
 
     async def search(
         self,
@@ -169,104 +248,146 @@ class Approach(ABC):
             "top": top,
             "query_language": self.query_language,
             "query_speller": self.query_speller,
-            "order_by": order_by,
         }
 
+        # Reuse results of a previous search whose query embedding is nearly identical to this one
+        cache_vector = next(
+            (v.vector for v in search_vectors if isinstance(v, VectorizedQuery) and v.fields == "embedding"), None
+        )
+        cache_scope = (
+            # Text search and semantic ranking score documents against the query text, not just its embedding
+            query_text if use_text_search or use_semantic_ranker else None,
+            filter,
+            top,
+            use_text_search,
+            use_semantic_captions,
+            minimum_search_score,
+            minimum_reranker_score,
+            use_semantic_ranker,
+            order_by,
+            tuple(v.fields for v in search_vectors),
+        )
+        search_results_cache = self._get_search_results_cache()
+        if cache_vector is not None and search_results_cache is not None:
+            cached_documents = search_results_cache.get(cache_scope, cache_vector)
+            if cached_documents is not None:
+                logger.debug("Reusing cached search results for a semantically similar query.")
+                return list(cached_documents)
+
         try:
             if use_semantic_ranker:
-                # --- >>> SAFEGUARD: Remove order_by for semantic search <<< ---
-                final_order_by = search_args.pop("order_by", None) # Remove order_by key
-                if final_order_by is not None:
-                    logger.warning(f"order_by ('{final_order_by}') was provided but ignored because semantic search is enabled.")
-                # --- >>> END SAFEGUARD <<< ---
-
-                # Add semantic-specific args
-                search_args.update({
-                    "query_language": self.query_language,
-                    "query_speller": self.query_speller,
+                # Semantic ranking always sorts by relevance, so order_by is never sent
+                if order_by is not None:
+                    logger.warning(f"order_by ('{order_by}') was provided but ignored because semantic search is enabled.")
+                search_args |= {
                     "query_caption": "extractive|highlight-false" if use_semantic_captions else None,
                     "query_type": QueryType.SEMANTIC,
                     "semantic_configuration_name": "default",
                     "semantic_query": query_text,
-                })
-                logger.debug(f"Executing semantic search with args: {search_args}")
-                results = await self.search_client.search(**search_args)
+                }
             else:
-                # For non-semantic, order_by (if not None) remains in search_args
-                logger.debug(f"Executing non-semantic search with args: {search_args}")
+                search_args["order_by"] = order_by
+            # search_args holds the query vectors, so only format it when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Executing %s search with args: %s", "semantic" if use_semantic_ranker else "non-semantic", search_args
+                )
+            # Queue in-process rather than flooding the search service under burst load
+            async with self._get_search_semaphore():
                 results = await self.search_client.search(**search_args)
 
-            documents = []
-            async for page in results.by_page():
-                async for document in page:
-                    documents.append(
-                        Document(
-                            id=document.get("id"),
-                            content=document.get("content"),
-                            embedding=document.get("embedding"),
-                            image_embedding=document.get("imageEmbedding"),
-                            category=document.get("category"),
-                            sourcepage=document.get("sourcepage"),
-                            sourcefile=document.get("sourcefile"),
-                            updatedate=document.get(self.updatedate_field) if self.updatedate_field else None,
-                            oids=document.get("oids"),
-                            groups=document.get("groups"),
-                            captions=cast(List[QueryCaptionResult], document.get("@search.captions")),
-                            score=document.get("@search.score"),
-                            reranker_score=document.get("@search.reranker_score"),
-                        )
-                    )
-
-                qualified_documents = []
-                for doc in documents: # documents contains the top N items returned by search
-                    passes = False
-                    if use_semantic_ranker:
-                        # If semantic, primarily check reranker score
-                        if (doc.reranker_score or -1.0) >= (minimum_reranker_score or -1.0):
-                            passes = True
-                            # Optional: ALSO require a minimum base score? Usually not needed with semantic.
-                            # if (doc.score or -1.0) < (minimum_search_score or -1.0):
-                            #     passes = False
-                    else:
-                        # If not semantic, check base score
-                        if (doc.score or -1.0) >= (minimum_search_score or -1.0):
-                            passes = True
-
-                    if passes:
-                        qualified_documents.append(doc)
-                    else:
-                        # Optional: Add detailed logging here to see why docs are filtered
-                        logger.debug(
-                            f"Document ID {getattr(doc, 'id', 'N/A')} filtered out. "
-                            f"Semantic: {use_semantic_ranker}, "
-                            f"Base Score: {doc.score} (Threshold: {minimum_search_score}), "
-                            f"Reranker Score: {doc.reranker_score} (Threshold: {minimum_reranker_score})."
+                initial_count = 0
+                qualified_documents: List[Document] = []
+                # Bound once outside the loop, as this runs for every returned document
+                qualified_documents_append = qualified_documents.append
+                updatedate_field = self.updatedate_field
+                async for page in prefetch_pages(results.by_page()):
+                    async for document in page:
+                        initial_count += 1
+                        get = document.get
+                        doc = Document(
+                            id=get("id"),
+                            content=get("content"),
+                            embedding=get("embedding"),
+                            image_embedding=get("imageEmbedding"),
+                            category=get("category"),
+                            sourcepage=get("sourcepage"),
+                            sourcefile=get("sourcefile"),
+                            updatedate=get(updatedate_field) if updatedate_field else None,
+                            oids=get("oids"),
+                            groups=get("groups"),
+                            captions=cast(List[QueryCaptionResult], get("@search.captions")),
+                            score=get("@search.score"),
+                            reranker_score=get("@search.reranker_score"),
                         )
 
-                logger.debug(f"Search returned {len(documents)} initial documents, {len(qualified_documents)} qualified after score filtering.")
-
+                        # Each document is checked against the score thresholds once, as soon as it is read
+                        passes = False
+                        if use_semantic_ranker:
+                            # If semantic, primarily check reranker score
+                            if (doc.reranker_score or -1.0) >= (minimum_reranker_score or -1.0):
+                                passes = True
+                                # Optional: ALSO require a minimum base score? Usually not needed with semantic.
+                                # if (doc.score or -1.0) < (minimum_search_score or -1.0):
+                                #     passes = False
+                        else:
+                            # If not semantic, check base score
+                            if (doc.score or -1.0) >= (minimum_search_score or -1.0):
+                                passes = True
+
+                        if passes:
+                            qualified_documents_append(doc)
+                        else:
+                            # Optional: Add detailed logging here to see why docs are filtered
+                            logger.debug(
+                                "Document ID %s filtered out. Semantic: %s, "
+                                "Base Score: %s (Threshold: %s), Reranker Score: %s (Threshold: %s).",
+                                doc.id,
+                                use_semantic_ranker,
+                                doc.score,
+                                minimum_search_score,
+                                doc.reranker_score,
+                                minimum_reranker_score,
+                            )
+
+            logger.debug(
+                "Search returned %d initial documents, %d qualified after score filtering.",
+                initial_count,
+                len(qualified_documents),
+            )
+
+            if cache_vector is not None and search_results_cache is not None:
+                search_results_cache.set(cache_scope, cache_vector, list(qualified_documents))
             return qualified_documents
         except Exception as e:
             logger.error(f"Error during Azure Search query with args: {search_args}", exc_info=True)
             return []
 
+    def serialize_search_results(self, results: List[Document], overrides: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Serializes search results for the thoughts of a response. Embedding previews are included
+        unless the include_embedding_preview override is false.
+        """
+        include_embedding_preview = bool(overrides.get("include_embedding_preview", True))
+        return [result.serialize_for_results(include_embedding_preview=include_embedding_preview) for result in results]
+
     def get_sources_content(
         self, results: List[Document], use_semantic_captions: bool, use_image_citation: bool
     ) -> list[str]:
 
-        def nonewlines(s: str) -> str:
-            return s.replace("\n", " ").replace("\r", " ")
-
+        get_citation = self.get_citation
         if use_semantic_captions:
             return [
-                (self.get_citation((doc.sourcepage or ""), use_image_citation))
+                get_citation((doc.sourcepage or ""), use_image_citation)
                 + ": "
-                + nonewlines(" . ".join([cast(str, c.text) for c in (doc.captions or [])]))
+                + " . ".join([cast(str, c.text) for c in (doc.captions or [])]).translate(NEWLINES_TO_SPACES)
                 for doc in results
             ]
         else:
             return [
-                (self.get_citation((doc.sourcepage or ""), use_image_citation)) + ": " + nonewlines(doc.content or "")
+                get_citation((doc.sourcepage or ""), use_image_citation)
+                + ": "
+                + (doc.content or "").translate(NEWLINES_TO_SPACES)
                 for doc in results
             ]
         
@@ -284,17 +405,14 @@ class Approach(ABC):
         return processed_sources
 
     def get_citation(self, sourcepage: str, use_image_citation: bool) -> str:
-        if use_image_citation:
+        # Most source pages aren't page images, so check the suffix before doing any parsing
+        if use_image_citation or sourcepage[-4:].lower() != ".png":
             return sourcepage
-        else:
-            path, ext = os.path.splitext(sourcepage)
-            if ext.lower() == ".png":
-                page_idx = path.rfind("-")
-                page_number = int(path[page_idx + 1 :])
-                return f"{path[:page_idx]}.pdf#page={page_number}"
-
+        match = PNG_PAGE_PATTERN.match(sourcepage)
+        if match is None:
             return sourcepage
-        
+        return f"{match.group(1)}.pdf#page={int(match.group(2))}"
+
     def encode_last_url_segment(self, url_string: str) -> str:
         """
         Encodes only the last segment of a URL path using percent-encoding.
@@ -312,87 +430,167 @@ class Approach(ABC):
         if not url_string:
             return ""
 
-        # boundaries: last slash, query start, fragment start
-        last_slash_index = url_string.rfind('/')
-        query_index = url_string.find('?')
-        fragment_index = url_string.find('#')
-
-        # Determine the end of the path segment to encode
-        path_end_index = len(url_string)
-        if query_index != -1:
-            path_end_index = query_index
-        if fragment_index != -1:
-            path_end_index = min(path_end_index, fragment_index)
-
-        # Isolate the parts using string slicing
-        base_path = ""          # The part before the segment to encode (includes last slash)
-        segment_to_encode = ""  # The actual segment text
-        # The part starting from the query or fragment, or empty string
-        remaining_part = url_string[path_end_index:]
-
-        if last_slash_index == -1:
-            # No slash found, the whole part before ? or # is the segment
-            segment_to_encode = url_string[:path_end_index]
-            base_path = ""
-        else:
-            # Slash found, determine the start of the segment
-            segment_start_index = last_slash_index + 1
-
-            # Ensure the segment index is strictly before the path end index
-            if segment_start_index < path_end_index:
-                segment_to_encode = url_string[segment_start_index:path_end_index]
-            else:
-                # Slash is at or after the start of query/fragment (e.g., "path/?query")
-                # or string ends with "/" - nothing to encode after the slash
-                segment_to_encode = "" # Handled below by encoding an empty string
-
-            # Base path includes the slash
-            base_path = url_string[:last_slash_index + 1]
+        # The path ends at the first query or fragment delimiter, whichever comes first
+        path = url_string.partition("#")[0].partition("?")[0]
+        remaining_part = url_string[len(path):]
+        # base_path keeps everything up to the last slash; segment is empty when the path ends with "/"
+        base_path, slash, segment_to_encode = path.rpartition("/")
 
         # safe='' ensures it encodes '/', '?', '&', '=', '+', etc., just like encodeURIComponent
         encoded_segment = urllib.parse.quote(segment_to_encode, safe='')
 
-        # 5. Reconstruct the URL using an f-string for clarity
-        return f"{base_path}{encoded_segment}{remaining_part}"
+        return f"{base_path}{slash}{encoded_segment}{remaining_part}"
 
     async def compute_text_embedding(self, q: str):
-        SUPPORTED_DIMENSIONS_MODEL = {
-            "text-embedding-ada-002": False,
-            "text-embedding-3-small": True,
-            "text-embedding-3-large": True,
-        }
+        query_vector = await self._embed_cached(q)
+        return VectorizedQuery(vector=query_vector, k_nearest_neighbors=50, fields="embedding")
 
-        class ExtraArgs(TypedDict, total=False):
-            dimensions: int
+    async def compute_text_embeddings(self, qs: List[str]) -> List[VectorizedQuery]:
+        """
+        Computes embeddings for several queries at once.
 
+        The requests are issued concurrently, so they share cached vectors and are coalesced
+        into batched embedding API calls by the embedding batcher.
+        """
+        return list(await asyncio.gather(*(self.compute_text_embedding(q) for q in qs)))
+
+    async def _embed_cached(self, q: str) -> List[float]:
+        """Returns the embedding vector for the query, reusing vectors of recently embedded queries."""
+        if self._embedding_cache is None:
+            self._embedding_cache = OrderedDict()
+        # Model and dimensions are part of the key so that switching models never returns stale vectors
+        cache_key = (self.embedding_model, self.embedding_dimensions, q)
+        cached_vector = self._embedding_cache.get(cache_key)
+        if cached_vector is not None:
+            self._embedding_cache.move_to_end(cache_key)
+            return cached_vector
+
+        query_vector = await self._get_embedding_batcher().embed(q)
+        self._embedding_cache[cache_key] = query_vector
+        if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+        return query_vector
+
+    def _get_search_results_cache(self) -> Optional[SemanticCache[List[Document]]]:
+        if not self._search_results_cache_configured:
+            self._search_results_cache_configured = True
+            ttl_seconds = float(os.getenv("SEARCH_RESULTS_CACHE_TTL", DEFAULT_SEARCH_RESULTS_CACHE_TTL))
+            if ttl_seconds > 0:
+                self._search_results_cache = SemanticCache(
+                    threshold=float(
+                        os.getenv("SEARCH_RESULTS_CACHE_THRESHOLD", DEFAULT_SEARCH_RESULTS_CACHE_THRESHOLD)
+                    ),
+                    ttl_seconds=ttl_seconds,
+                )
+        return self._search_results_cache
+
+    def _get_search_semaphore(self) -> asyncio.Semaphore:
+        if self._search_semaphore is None:
+            self._search_semaphore = asyncio.Semaphore(
+                int(os.getenv("SEARCH_MAX_CONCURRENCY", DEFAULT_SEARCH_MAX_CONCURRENCY))
+            )
+        return self._search_semaphore
+
+    def _get_embedding_semaphore(self) -> asyncio.Semaphore:
+        if self._embedding_semaphore is None:
+            self._embedding_semaphore = asyncio.Semaphore(
+                int(os.getenv("EMBEDDING_MAX_CONCURRENCY", DEFAULT_EMBEDDING_MAX_CONCURRENCY))
+            )
+        return self._embedding_semaphore
+
+    def _get_embedding_batcher(self) -> EmbeddingBatcher:
+        # Concurrent queries are only coalesced when they target the same model and dimensions
+        if self._embedding_batchers is None:
+            self._embedding_batchers = {}
+        batcher_key = (self.embedding_model, self.embedding_dimensions)
+        if batcher_key not in self._embedding_batchers:
+            self._embedding_batchers[batcher_key] = EmbeddingBatcher(self._embed_batch)
+        return self._embedding_batchers[batcher_key]
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         dimensions_args: ExtraArgs = (
-            {"dimensions": self.embedding_dimensions} if SUPPORTED_DIMENSIONS_MODEL[self.embedding_model] else {}
-        )
-        embedding = await self.openai_client.embeddings.create(
-            # Azure OpenAI takes the deployment name as the model name
-            model=self.embedding_deployment if self.embedding_deployment else self.embedding_model,
-            input=q,
-            **dimensions_args,
+            {"dimensions": self.embedding_dimensions} if self.embedding_model in DIMENSIONS_SUPPORTED_MODELS else {}
         )
-        query_vector = embedding.data[0].embedding
-        return VectorizedQuery(vector=query_vector, k_nearest_neighbors=50, fields="embedding")
+        async with self._get_embedding_semaphore():
+            embedding = await self.openai_client.embeddings.create(
+                # Azure OpenAI takes the deployment name as the model name
+                model=self.embedding_deployment if self.embedding_deployment else self.embedding_model,
+                input=texts,
+                **dimensions_args,
+            )
+        return [data.embedding for data in sorted(embedding.data, key=lambda data: data.index)]
 
     async def compute_image_embedding(self, q: str):
         endpoint = urllib.parse.urljoin(self.vision_endpoint, "computervision/retrieval:vectorizeText")
         headers = {"Content-Type": "application/json"}
         params = {"api-version": "2023-02-01-preview", "modelVersion": "latest"}
-        data = {"text": q}
+        # Encoded up front so aiohttp sends the bytes as-is instead of wrapping them in a JSON payload
+        data = json.dumps({"text": q}).encode()
 
-        headers["Authorization"] = "Bearer " + await self.vision_token_provider()
+        headers["Authorization"] = "Bearer " + await self._get_vision_token()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url=endpoint, params=params, headers=headers, json=data, raise_for_status=True
-            ) as response:
-                json = await response.json()
-                image_query_vector = json["vector"]
+        session = self._get_http_session()
+        async with session.post(
+            url=endpoint, params=params, headers=headers, data=data, raise_for_status=True
+        ) as response:
+            # json.loads parses the raw bytes directly, skipping aiohttp's decode-to-str step
+            image_query_vector = json.loads(await response.read())["vector"]
         return VectorizedQuery(vector=image_query_vector, k_nearest_neighbors=50, fields="imageEmbedding")
 
+    async def compute_text_and_image_embeddings(
+        self, q: str, vector_fields: Sequence[str] = ("embedding", "imageEmbedding")
+    ) -> List[VectorQuery]:
+        """
+        Computes the query embeddings for the given vector fields concurrently.
+
+        Text ("embedding") and image ("imageEmbedding") embeddings come from independent services,
+        so approaches that search both fields should use this instead of awaiting them one after the other.
+        The returned queries are in the same order as vector_fields.
+        """
+        return list(
+            await asyncio.gather(
+                *(
+                    self.compute_text_embedding(q) if field == "embedding" else self.compute_image_embedding(q)
+                    for field in vector_fields
+                )
+            )
+        )
+
+    async def _get_vision_token(self) -> str:
+        """Returns the vision bearer token, only calling the token provider when the cached one is about to expire."""
+        if self._vision_token and time.time() < self._vision_token[1] - VISION_TOKEN_REFRESH_MARGIN:
+            return self._vision_token[0]
+        if self._vision_token_lock is None:
+            self._vision_token_lock = asyncio.Lock()
+        async with self._vision_token_lock:
+            # Another request may have refreshed the token while this one waited for the lock
+            if self._vision_token is None or time.time() >= self._vision_token[1] - VISION_TOKEN_REFRESH_MARGIN:
+                token = await self.vision_token_provider()
+                self._vision_token = (token, self._get_token_expiry(token))
+            return self._vision_token[0]
+
+    @staticmethod
+    def _get_token_expiry(token: str) -> float:
+        try:
+            expires_on = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            expires_on = None
+        return float(expires_on) if expires_on else time.time() + VISION_TOKEN_FALLBACK_TTL
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Returns a shared HTTP session so that connections to the vision endpoint are kept alive across calls."""
+        # Creating the session never awaits, so no lock is needed to avoid creating two of them
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+            )
+        return self._http_session
+
+    async def close(self):
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+
     def get_system_prompt_variables(self, override_prompt: Optional[str]) -> dict[str, str]:
         # Allows client to replace the entire prompt, or to inject into the existing prompt using >>>
         if override_prompt is None:
@@ -267,7 +267,7 @@ class ChatReadRetrieveReadApproach(ChatApproach):
                 ),
                 ThoughtStep(
                     "Search results",
-                    [result.serialize_for_results() for result in results],
+                    self.serialize_search_results(results, overrides),
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
@@ -132,13 +132,7 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
         # If retrieval mode includes vectors, compute an embedding for the query
         vectors = []
         if use_vector_search:
-            for field in vector_fields:
-                vector = (
-                    await self.compute_text_embedding(query_text)
-                    if field == "embedding"
-                    else await self.compute_image_embedding(query_text)
-                )
-                vectors.append(vector)
+            vectors = await self.compute_text_and_image_embeddings(query_text, vector_fields)
 
         results = await self.search(
             top,
@@ -215,7 +209,7 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
                 ),
                 ThoughtStep(
                     "Search results",
-                    [result.serialize_for_results() for result in results],
+                    self.serialize_search_results(results, overrides),
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
@@ -147,7 +147,7 @@ class RetrieveThenReadApproach(Approach):
                 ),
                 ThoughtStep(
                     "Search results",
-                    [result.serialize_for_results() for result in results],
+                    self.serialize_search_results(results, overrides),
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
@@ -89,13 +89,7 @@ class RetrieveThenReadVisionApproach(Approach):
         # If retrieval mode includes vectors, compute an embedding for the query
         vectors = []
         if use_vector_search:
-            for field in vector_fields:
-                vector = (
-                    await self.compute_text_embedding(q)
-                    if field == "embedding"
-                    else await self.compute_image_embedding(q)
-                )
-                vectors.append(vector)
+            vectors = await self.compute_text_and_image_embeddings(q, vector_fields)
 
         results = await self.search(
             top,
@@ -154,7 +148,7 @@ class RetrieveThenReadVisionApproach(Approach):
                 ),
                 ThoughtStep(
                     "Search results",
-                    [result.serialize_for_results() for result in results],
+                    self.serialize_search_results(results, overrides),
                 ),
                 ThoughtStep(
                     "Prompt to generate answer",
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into one batched call.
+
+    The first request waits up to flush_interval seconds for other requests to arrive,
+    and a batch is sent as soon as max_batch_size texts are pending.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 16,
+        flush_interval: float = 0.005,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, asyncio.Future[List[float]]]] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        # Keeps a reference to in-flight batches so they aren't garbage collected before completing
+        self._send_tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        future: asyncio.Future[List[float]] = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.flush_interval, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        while self._pending:
+            batch, self._pending = self._pending[: self.max_batch_size], self._pending[self.max_batch_size :]
+            task = asyncio.create_task(self._send(batch))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, "asyncio.Future[List[float]]"]]):
+        # Identical texts in the same batch are only embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            embeddings = await self.embed_batch(unique_texts)
+            if len(embeddings) != len(unique_texts):
+                raise ValueError(f"Expected {len(unique_texts)} embeddings, got {len(embeddings)}")
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        embedding_by_text = dict(zip(unique_texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(embedding_by_text[text])
@@ -0,0 +1,78 @@
+import math
+import operator
+import time
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Vector dimensions compared at a time, so a lookup stops as soon as an entry is known to be too far away
+COMPARE_CHUNK_SIZE = 64
+
+
+def normalize_vector(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(map(operator.mul, vector, vector)))
+    if norm == 0:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+def within_squared_distance(a: List[float], b: List[float], max_squared_distance: float) -> bool:
+    """
+    Returns whether the squared euclidean distance between two vectors is at most max_squared_distance.
+    The distance only grows as dimensions are added, so dissimilar vectors are rejected after the first chunks.
+    """
+    squared_distance = 0.0
+    for start in range(0, len(a), COMPARE_CHUNK_SIZE):
+        end = start + COMPARE_CHUNK_SIZE
+        difference = list(map(operator.sub, a[start:end], b[start:end]))
+        squared_distance += sum(map(operator.mul, difference, difference))
+        if squared_distance > max_squared_distance:
+            return False
+    return True
+
+
+class SemanticCache(Generic[T]):
+    """
+    Small in-memory cache that returns a stored value when a new query vector is close enough
+    (by cosine similarity) to the vector of a previously cached query.
+
+    Entries are only compared when their scope matches exactly, so callers should put every
+    parameter that affects the cached value (filters, top, ranking options...) in the scope.
+    Similarity is computed in pure Python, so keep max_entries small. Entries are checked from the most
+    recently used one, the first close enough is returned.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 300, max_entries: int = 128):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Ordered from least to most recently used: (scope, normalized vector, value, stored_at)
+        self._entries: List[Tuple[Hashable, List[float], T, float]] = []
+
+    def get(self, scope: Hashable, vector: List[float]) -> Optional[T]:
+        now = time.monotonic()
+        self._entries = [entry for entry in self._entries if now - entry[3] < self.ttl_seconds]
+        query = normalize_vector(vector)
+        # For unit vectors, cosine similarity >= threshold is the same as squared distance <= 2 * (1 - threshold)
+        max_squared_distance = 2 * (1 - self.threshold)
+        for index in range(len(self._entries) - 1, -1, -1):
+            entry_scope, entry_vector, value, _ = self._entries[index]
+            if (
+                entry_scope == scope
+                and len(entry_vector) == len(query)
+                and within_squared_distance(entry_vector, query, max_squared_distance)
+            ):
+                self._entries.append(self._entries.pop(index))
+                return value
+        return None
+
+    def set(self, scope: Hashable, vector: List[float], value: T) -> None:
+        self._entries.append((scope, normalize_vector(vector), value, time.monotonic()))
+        if len(self._entries) > self.max_entries:
+            del self._entries[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -2,6 +2,7 @@ import argparse
 import asyncio
 import logging
 import os
+from dataclasses import dataclass
 from typing import Optional, Union, Dict 
 
 from azure.core.credentials import AzureKeyCredential
@@ -11,6 +12,7 @@ from rich.logging import RichHandler
 
 from load_azd_env import load_azd_env
 from prepdocslib.blobmanager import BlobManager
+from prepdocslib.cachingtokencredential import CachingTokenCredential
 from prepdocslib.csvparser import CsvParser
 from prepdocslib.embeddings import (
     AzureOpenAIEmbeddingService,
@@ -40,6 +42,99 @@ from prepdocslib.textsplitter import SentenceTextSplitter, SimpleTextSplitter
 
 logger = logging.getLogger("scripts")
 
+# The splitters hold no per-document state, so every file processor shares the same instances
+SENTENCE_TEXT_SPLITTER = SentenceTextSplitter()
+# Good for CSV, maybe simple JSON content if needed
+SIMPLE_TEXT_SPLITTER = SimpleTextSplitter()
+
+# Office and image formats that are only parsed by Document Intelligence
+DOCUMENT_INTELLIGENCE_FORMATS = frozenset(
+    {
+        ".docx", ".pptx", ".xlsx", # Office formats
+        ".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".heic" # Image formats
+    }
+)
+
+
+@dataclass(frozen=True)
+class PrepDocsConfig:
+    """Environment settings used by prepdocs, read once after the azd environment is loaded."""
+
+    search_service: str
+    search_index: str
+    storage_account: str
+    storage_container: str
+    storage_resource_group: str
+    subscription_id: str
+    openai_host: str
+    embed_model_name: str
+    use_int_vectorization: bool = False
+    use_gptvision: bool = False
+    disable_vectors: bool = False
+    use_content_understanding: bool = False
+    tenant_id: Optional[str] = None
+    json_url_metadata_field: str = "sourcefile"
+    datalake_storage_account: Optional[str] = None
+    datalake_filesystem: Optional[str] = None
+    datalake_path: Optional[str] = None
+    openai_api_key_override: Optional[str] = None
+    openai_api_key: Optional[str] = None
+    embed_dimensions: int = 1536
+    openai_service: Optional[str] = None
+    openai_custom_url: Optional[str] = None
+    embed_deployment_name: Optional[str] = None
+    openai_api_version: str = "2024-06-01"
+    openai_organization: Optional[str] = None
+    search_analyzer_name: Optional[str] = None
+    document_intelligence_service: Optional[str] = None
+    document_intelligence_concurrency: int = 8
+    use_local_pdf_parser: bool = False
+    use_local_html_parser: bool = False
+    content_understanding_endpoint: Optional[str] = None
+    vision_endpoint: Optional[str] = None
+
+    @property
+    def use_acls(self) -> bool:
+        return self.datalake_storage_account is not None
+
+    @classmethod
+    def from_env(cls) -> "PrepDocsConfig":
+        return cls(
+            search_service=os.environ["AZURE_SEARCH_SERVICE"],
+            search_index=os.environ["AZURE_SEARCH_INDEX"],
+            storage_account=os.environ["AZURE_STORAGE_ACCOUNT"],
+            storage_container=os.environ["AZURE_STORAGE_CONTAINER"],
+            storage_resource_group=os.environ["AZURE_STORAGE_RESOURCE_GROUP"],
+            subscription_id=os.environ["AZURE_SUBSCRIPTION_ID"],
+            openai_host=os.environ["OPENAI_HOST"],
+            embed_model_name=os.environ["AZURE_AI_EMBED_MODEL_NAME"],
+            use_int_vectorization=os.getenv("USE_FEATURE_INT_VECTORIZATION", "").lower() == "true",
+            use_gptvision=os.getenv("USE_GPT4V", "").lower() == "true",
+            disable_vectors=os.getenv("USE_VECTORS", "").lower() == "false",
+            use_content_understanding=os.getenv("USE_MEDIA_DESCRIBER_AZURE_CU", "").lower() == "true",
+            tenant_id=os.getenv("AZURE_TENANT_ID"),
+            json_url_metadata_field=os.getenv("AZURE_SEARCH_JSON_URL_FIELD", "sourcefile"),
+            datalake_storage_account=os.getenv("AZURE_ADLS_GEN2_STORAGE_ACCOUNT"),
+            datalake_filesystem=os.getenv("AZURE_ADLS_GEN2_FILESYSTEM"),
+            datalake_path=os.getenv("AZURE_ADLS_GEN2_FILESYSTEM_PATH"),
+            openai_api_key_override=os.getenv("AZURE_OPENAI_API_KEY_OVERRIDE"),
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            embed_dimensions=int(os.getenv("AZURE_AI_EMBED_DIMENSIONS") or 1536),
+            openai_service=os.getenv("AZURE_AI_SERVICE_NAME"),
+            openai_custom_url=os.getenv("AZURE_OPENAI_CUSTOM_URL"),
+            embed_deployment_name=os.getenv("AZURE_AI_EMBED_DEPLOYMENT_NAME"),
+            # https://learn.microsoft.com/azure/ai-services/openai/api-version-deprecation#latest-ga-api-release
+            openai_api_version=os.getenv("AZURE_AI_CHAT_MODEL_VERSION") or "2024-06-01",
+            openai_organization=os.getenv("OPENAI_ORGANIZATION"),
+            search_analyzer_name=os.getenv("AZURE_SEARCH_ANALYZER_NAME"),
+            document_intelligence_service=os.getenv("AZURE_DOCUMENTINTELLIGENCE_SERVICE"),
+            document_intelligence_concurrency=int(os.getenv("AZURE_DOCUMENTINTELLIGENCE_CONCURRENCY", "8")),
+            use_local_pdf_parser=os.getenv("USE_LOCAL_PDF_PARSER") == "true",
+            use_local_html_parser=os.getenv("USE_LOCAL_HTML_PARSER") == "true",
+            content_understanding_endpoint=os.getenv("AZURE_CONTENTUNDERSTANDING_ENDPOINT"),
+            vision_endpoint=os.getenv("AZURE_VISION_ENDPOINT"),
+        )
+
 
 def clean_key_if_exists(key: Union[str, None]) -> Union[str, None]:
     """Remove leading and trailing whitespace from a key if it exists. If the key is empty, return None."""
@@ -165,13 +260,14 @@ def setup_file_processors(
     use_content_understanding: bool = False, # Keep CU params if needed by DI parser
     content_understanding_endpoint: Union[str, None] = None,
     # --- ADD parameter for the metadata field name ---
-    json_metadata_field: str = "sourcefile"
+    json_metadata_field: str = "sourcefile",
+    document_intelligence_concurrency: int = 8,
 ) -> Dict[str, FileProcessor]:
     """Configures and returns a dictionary of file processors."""
 
     # Choose appropriate splitters
-    sentence_text_splitter = SentenceTextSplitter()
-    simple_text_splitter = SimpleTextSplitter() # Good for CSV, maybe simple JSON content if needed
+    sentence_text_splitter = SENTENCE_TEXT_SPLITTER
+    simple_text_splitter = SIMPLE_TEXT_SPLITTER
 
     # Setup Document Intelligence parser (if configured)
     doc_int_parser: Optional[DocumentAnalysisParser] = None
@@ -185,6 +281,7 @@ def setup_file_processors(
             credential=documentintelligence_creds,
             use_content_understanding=use_content_understanding,
             content_understanding_endpoint=content_understanding_endpoint,
+            max_concurrency=document_intelligence_concurrency,
         )
 
 
@@ -221,8 +318,9 @@ def setup_file_processors(
     )
 
     # Add standard text-based formats
-    file_processors[".md"] = FileProcessor(TextParser(), sentence_text_splitter)
-    file_processors[".txt"] = FileProcessor(TextParser(), sentence_text_splitter)
+    text_processor = FileProcessor(TextParser(), sentence_text_splitter)
+    file_processors[".md"] = text_processor
+    file_processors[".txt"] = text_processor
     # Use simple splitter for CSV as structure is tabular, not sentential
     file_processors[".csv"] = FileProcessor(CsvParser(), simple_text_splitter)
 
@@ -234,15 +332,12 @@ def setup_file_processors(
     if html_parser:
         file_processors[".html"] = FileProcessor(html_parser, sentence_text_splitter)
 
-    # Add Document Intelligence handled types (if DI is configured)
+    # Add Document Intelligence handled types (if DI is configured), all sharing a single processor
     if doc_int_parser:
-        di_formats = {
-            ".docx", ".pptx", ".xlsx", # Office formats
-            ".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".heic" # Image formats
-        }
-        for ext in di_formats:
+        doc_int_processor = FileProcessor(doc_int_parser, sentence_text_splitter)
+        for ext in DOCUMENT_INTELLIGENCE_FORMATS:
             # Use sentence splitter for text extracted from these formats
-            file_processors[ext] = FileProcessor(doc_int_parser, sentence_text_splitter)
+            file_processors[ext] = doc_int_processor
 
     logger.info("Registered file processors for extensions: %s", list(file_processors.keys()))
     return file_processors
@@ -270,6 +365,150 @@ async def main(strategy: Strategy, setup_index: bool = True):
     await strategy.run()
 
 
+async def run_ingestion(args: argparse.Namespace, config: PrepDocsConfig):
+    use_int_vectorization = config.use_int_vectorization
+    use_gptvision = config.use_gptvision
+    use_acls = config.use_acls
+    dont_use_vectors = config.disable_vectors
+    use_content_understanding = config.use_content_understanding
+
+    # Use the current user identity to connect to Azure services. See infra/main.bicep for role assignments.
+    if tenant_id := config.tenant_id:
+        logger.info("Connecting to Azure services using the azd credential for tenant %s", tenant_id)
+        azd_credential = CachingTokenCredential(AzureDeveloperCliCredential(tenant_id=tenant_id, process_timeout=60))
+    else:
+        logger.info("Connecting to Azure services using the azd credential for home tenant")
+        azd_credential = CachingTokenCredential(AzureDeveloperCliCredential(process_timeout=60))
+
+    if args.removeall:
+        document_action = DocumentAction.RemoveAll
+    elif args.remove:
+        document_action = DocumentAction.Remove
+    else:
+        document_action = DocumentAction.Add
+
+    # --- Define Metadata Field Name for JSON ---
+    # Read from environment or default to "sourcefile"
+    json_url_metadata_field = config.json_url_metadata_field
+    logger.info("JSON 'url' will be mapped to Azure Search field: '%s'", json_url_metadata_field)
+    search_info = await setup_search_info(
+        search_service=config.search_service,
+        index_name=config.search_index,
+        azure_credential=azd_credential,
+        search_key=clean_key_if_exists(args.searchkey),
+    )
+    blob_manager = setup_blob_manager(
+        azure_credential=azd_credential,
+        storage_account=config.storage_account,
+        storage_container=config.storage_container,
+        storage_resource_group=config.storage_resource_group,
+        subscription_id=config.subscription_id,
+        search_images=use_gptvision,
+        storage_key=clean_key_if_exists(args.storagekey),
+    )
+    list_file_strategy = setup_list_file_strategy(
+        azure_credential=azd_credential,
+        local_files=args.files,
+        datalake_storage_account=config.datalake_storage_account,
+        datalake_filesystem=config.datalake_filesystem,
+        datalake_path=config.datalake_path,
+        datalake_key=clean_key_if_exists(args.datalakekey),
+    )
+
+    openai_host = config.openai_host
+    openai_key = None
+    if config.openai_api_key_override:
+        openai_key = config.openai_api_key_override
+    elif not openai_host.startswith("azure") and config.openai_api_key:
+        openai_key = config.openai_api_key
+
+    openai_dimensions = config.embed_dimensions
+    openai_embeddings_service = setup_embeddings_service(
+        azure_credential=azd_credential,
+        openai_host=openai_host,
+        openai_model_name=config.embed_model_name,
+        openai_service=config.openai_service,
+        openai_custom_url=config.openai_custom_url,
+        openai_deployment=config.embed_deployment_name,
+        openai_api_version=config.openai_api_version,
+        openai_dimensions=openai_dimensions,
+        openai_key=clean_key_if_exists(openai_key),
+        openai_org=config.openai_organization,
+        disable_vectors=dont_use_vectors,
+        disable_batch_vectors=args.disablebatchvectors,
+    )
+
+    # Fetch the tokens for every service that uses the azd credential up front and in parallel,
+    # since each azd token request starts a subprocess
+    token_scopes = []
+    if clean_key_if_exists(args.searchkey) is None:
+        token_scopes.append("https://search.azure.com/.default")
+    if clean_key_if_exists(args.storagekey) is None:
+        token_scopes.append("https://storage.azure.com/.default")
+    if openai_embeddings_service is not None and openai_host != "openai" and clean_key_if_exists(openai_key) is None:
+        token_scopes.append("https://cognitiveservices.azure.com/.default")
+    await azd_credential.warm(token_scopes)
+
+    ingestion_strategy: Strategy
+    if use_int_vectorization:
+
+        if not openai_embeddings_service or not isinstance(openai_embeddings_service, AzureOpenAIEmbeddingService):
+            raise Exception("Integrated vectorization strategy requires an Azure OpenAI embeddings service")
+
+        ingestion_strategy = IntegratedVectorizerStrategy(
+            search_info=search_info,
+            list_file_strategy=list_file_strategy,
+            blob_manager=blob_manager,
+            document_action=document_action,
+            embeddings=openai_embeddings_service,
+            subscription_id=config.subscription_id,
+            search_service_user_assigned_id=args.searchserviceassignedid,
+            search_analyzer_name=config.search_analyzer_name,
+            use_acls=use_acls,
+            category=args.category,
+        )
+    else:
+        file_processors = setup_file_processors(
+            azure_credential=azd_credential,
+            document_intelligence_service=config.document_intelligence_service,
+            document_intelligence_key=clean_key_if_exists(args.documentintelligencekey),
+            local_pdf_parser=config.use_local_pdf_parser,
+            local_html_parser=config.use_local_html_parser,
+            search_images=use_gptvision,
+            use_content_understanding=use_content_understanding,
+            content_understanding_endpoint=config.content_understanding_endpoint,
+            # --- Pass the JSON metadata field name ---
+            json_metadata_field=json_url_metadata_field,
+            document_intelligence_concurrency=config.document_intelligence_concurrency,
+        )
+        image_embeddings_service = setup_image_embeddings_service(
+            azure_credential=azd_credential,
+            vision_endpoint=config.vision_endpoint,
+            search_images=use_gptvision,
+        )
+
+        ingestion_strategy = FileStrategy(
+            search_info=search_info,
+            list_file_strategy=list_file_strategy,
+            blob_manager=blob_manager,
+            file_processors=file_processors,
+            document_action=document_action,
+            embeddings=openai_embeddings_service,
+            image_embeddings=image_embeddings_service,
+            search_analyzer_name=config.search_analyzer_name,
+            use_acls=use_acls,
+            category=args.category,
+            use_content_understanding=use_content_understanding,
+            content_understanding_endpoint=config.content_understanding_endpoint,
+            parse_workers=args.parseworkers,
+            max_concurrency=args.maxconcurrency,
+        )
+    # Determine if index setup should be skipped
+    should_setup_index = not (args.remove or args.removeall)
+    logger.info(f"Index setup {'enabled' if should_setup_index else 'disabled'}.")
+    await main(ingestion_strategy, setup_index=should_setup_index)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Prepare documents by extracting content from PDFs, splitting content into sections, uploading to blob storage, and indexing in a search index."
@@ -321,6 +560,19 @@ if __name__ == "__main__":
         help="Search service system assigned Identity (Managed identity) (used for integrated vectorization)",
     )
 
+    parser.add_argument(
+        "--parseworkers",
+        type=int,
+        required=False,
+        help="Optional. Number of worker processes used to parse files in parallel (default: parse in the main process)",
+    )
+    parser.add_argument(
+        "--maxconcurrency",
+        type=int,
+        default=32,
+        help="Maximum number of files processed at the same time (default: 32)",
+    )
+
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     args = parser.parse_args()
 
@@ -356,153 +608,27 @@ if __name__ == "__main__":
 
     load_azd_env()
 
+    # Checked before the configuration is read, so the script exits cleanly without the other settings
     if os.getenv("AZURE_PUBLIC_NETWORK_ACCESS") == "Disabled":
         logger.error("AZURE_PUBLIC_NETWORK_ACCESS is set to Disabled. Exiting.")
         exit(0)
 
-    use_int_vectorization = os.getenv("USE_FEATURE_INT_VECTORIZATION", "").lower() == "true"
-    use_gptvision = os.getenv("USE_GPT4V", "").lower() == "true"
-    use_acls = os.getenv("AZURE_ADLS_GEN2_STORAGE_ACCOUNT") is not None
-    dont_use_vectors = os.getenv("USE_VECTORS", "").lower() == "false"
-    use_content_understanding = os.getenv("USE_MEDIA_DESCRIBER_AZURE_CU", "").lower() == "true"
-
-    # Use the current user identity to connect to Azure services. See infra/main.bicep for role assignments.
-    if tenant_id := os.getenv("AZURE_TENANT_ID"):
-        logger.info("Connecting to Azure services using the azd credential for tenant %s", tenant_id)
-        azd_credential = AzureDeveloperCliCredential(tenant_id=tenant_id, process_timeout=60)
-    else:
-        logger.info("Connecting to Azure services using the azd credential for home tenant")
-        azd_credential = AzureDeveloperCliCredential(process_timeout=60)
-
-    if args.removeall:
-        document_action = DocumentAction.RemoveAll
-    elif args.remove:
-        document_action = DocumentAction.Remove
-    else:
-        document_action = DocumentAction.Add
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    # --- Define Metadata Field Name for JSON ---
-    # Read from environment or default to "sourcefile"
-    json_url_metadata_field = os.getenv("AZURE_SEARCH_JSON_URL_FIELD", "sourcefile")
-    logger.info("JSON 'url' will be mapped to Azure Search field: '%s'", json_url_metadata_field)
     try:
-        search_info = loop.run_until_complete(
-            setup_search_info(
-                search_service=os.environ["AZURE_SEARCH_SERVICE"],
-                index_name=os.environ["AZURE_SEARCH_INDEX"],
-                azure_credential=azd_credential,
-                search_key=clean_key_if_exists(args.searchkey),
-            )
-        )
-        blob_manager = setup_blob_manager(
-            azure_credential=azd_credential,
-            storage_account=os.environ["AZURE_STORAGE_ACCOUNT"],
-            storage_container=os.environ["AZURE_STORAGE_CONTAINER"],
-            storage_resource_group=os.environ["AZURE_STORAGE_RESOURCE_GROUP"],
-            subscription_id=os.environ["AZURE_SUBSCRIPTION_ID"],
-            search_images=use_gptvision,
-            storage_key=clean_key_if_exists(args.storagekey),
-        )
-        list_file_strategy = setup_list_file_strategy(
-            azure_credential=azd_credential,
-            local_files=args.files,
-            datalake_storage_account=os.getenv("AZURE_ADLS_GEN2_STORAGE_ACCOUNT"),
-            datalake_filesystem=os.getenv("AZURE_ADLS_GEN2_FILESYSTEM"),
-            datalake_path=os.getenv("AZURE_ADLS_GEN2_FILESYSTEM_PATH"),
-            datalake_key=clean_key_if_exists(args.datalakekey),
-        )
-
-        openai_host = os.environ["OPENAI_HOST"]
-        openai_key = None
-        if os.getenv("AZURE_OPENAI_API_KEY_OVERRIDE"):
-            openai_key = os.getenv("AZURE_OPENAI_API_KEY_OVERRIDE")
-        elif not openai_host.startswith("azure") and os.getenv("OPENAI_API_KEY"):
-            openai_key = os.getenv("OPENAI_API_KEY")
-
-        openai_dimensions = 1536
-        if os.getenv("AZURE_AI_EMBED_DIMENSIONS"):
-            openai_dimensions = int(os.environ["AZURE_AI_EMBED_DIMENSIONS"])
-        openai_embeddings_service = setup_embeddings_service(
-            azure_credential=azd_credential,
-            openai_host=openai_host,
-            openai_model_name=os.environ["AZURE_AI_EMBED_MODEL_NAME"],
-            openai_service=os.getenv("AZURE_AI_SERVICE_NAME"),
-            openai_custom_url=os.getenv("AZURE_OPENAI_CUSTOM_URL"),
-            openai_deployment=os.getenv("AZURE_AI_EMBED_DEPLOYMENT_NAME"),
-            # https://learn.microsoft.com/azure/ai-services/openai/api-version-deprecation#latest-ga-api-release
-            openai_api_version=os.getenv("AZURE_AI_CHAT_MODEL_VERSION") or "2024-06-01",
-            openai_dimensions=openai_dimensions,
-            openai_key=clean_key_if_exists(openai_key),
-            openai_org=os.getenv("OPENAI_ORGANIZATION"),
-            disable_vectors=dont_use_vectors,
-            disable_batch_vectors=args.disablebatchvectors,
-        )
+        # uvloop is optional (and unavailable on Windows), the default event loop is used without it
+        import uvloop
 
-        ingestion_strategy: Strategy
-        if use_int_vectorization:
-
-            if not openai_embeddings_service or not isinstance(openai_embeddings_service, AzureOpenAIEmbeddingService):
-                raise Exception("Integrated vectorization strategy requires an Azure OpenAI embeddings service")
-
-            ingestion_strategy = IntegratedVectorizerStrategy(
-                search_info=search_info,
-                list_file_strategy=list_file_strategy,
-                blob_manager=blob_manager,
-                document_action=document_action,
-                embeddings=openai_embeddings_service,
-                subscription_id=os.environ["AZURE_SUBSCRIPTION_ID"],
-                search_service_user_assigned_id=args.searchserviceassignedid,
-                search_analyzer_name=os.getenv("AZURE_SEARCH_ANALYZER_NAME"),
-                use_acls=use_acls,
-                category=args.category,
-            )
-        else:
-            file_processors = setup_file_processors(
-                azure_credential=azd_credential,
-                document_intelligence_service=os.getenv("AZURE_DOCUMENTINTELLIGENCE_SERVICE"),
-                document_intelligence_key=clean_key_if_exists(args.documentintelligencekey),
-                local_pdf_parser=os.getenv("USE_LOCAL_PDF_PARSER") == "true",
-                local_html_parser=os.getenv("USE_LOCAL_HTML_PARSER") == "true",
-                search_images=use_gptvision,
-                use_content_understanding=use_content_understanding,
-                content_understanding_endpoint=os.getenv("AZURE_CONTENTUNDERSTANDING_ENDPOINT"),
-                # --- Pass the JSON metadata field name ---
-                json_metadata_field=json_url_metadata_field
-            )
-            image_embeddings_service = setup_image_embeddings_service(
-                azure_credential=azd_credential,
-                vision_endpoint=os.getenv("AZURE_VISION_ENDPOINT"),
-                search_images=use_gptvision,
-            )
-
-            ingestion_strategy = FileStrategy(
-                search_info=search_info,
-                list_file_strategy=list_file_strategy,
-                blob_manager=blob_manager,
-                file_processors=file_processors,
-                document_action=document_action,
-                embeddings=openai_embeddings_service,
-                image_embeddings=image_embeddings_service,
-                search_analyzer_name=os.getenv("AZURE_SEARCH_ANALYZER_NAME"),
-                use_acls=use_acls,
-                category=args.category,
-                use_content_understanding=use_content_understanding,
-                content_understanding_endpoint=os.getenv("AZURE_CONTENTUNDERSTANDING_ENDPOINT"),
-            )
-        # Determine if index setup should be skipped
-        should_setup_index = not (args.remove or args.removeall)
-        logger.info(f"Index setup {'enabled' if should_setup_index else 'disabled'}.")
-        loop.run_until_complete(main(ingestion_strategy, setup_index=not args.remove and not args.removeall))
-        loop.close()
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("Using uvloop event loop")
+    except ImportError:
+        pass
 
+    try:
+        # Missing or malformed settings are reported by the handler below
+        config = PrepDocsConfig.from_env()
+        asyncio.run(run_ingestion(args, config))
     except Exception as e:
          logger.exception(f"An error occurred during the script execution: {e}")
          # Optionally exit with a non-zero code on error
          # exit(1)
     finally:
-        # Close the loop
-        loop.close()
-        logger.info("Script execution finished.")
\ No newline at end of file
+        logger.info("Script execution finished.")
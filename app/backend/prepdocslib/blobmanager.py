@@ -7,6 +7,7 @@ from typing import List, Optional, Union
 
 import pymupdf
 from azure.core.credentials_async import AsyncTokenCredential
+from azure.core.exceptions import ResourceExistsError
 from azure.storage.blob import (
     BlobSasPermissions,
     UserDelegationKey,
@@ -50,7 +51,11 @@ class BlobManager:
             account_url=self.endpoint, credential=self.credential, max_single_put_size=4 * 1024 * 1024
         ) as service_client, service_client.get_container_client(self.container) as container_client:
             if not await container_client.exists():
-                await container_client.create_container()
+                try:
+                    await container_client.create_container()
+                except ResourceExistsError:
+                    # Another upload running at the same time created the container first
+                    pass
 
             # Re-open and upload the original file
             if file.url is None:
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from types import TracebackType
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from azure.core.credentials import AccessToken
+from azure.core.credentials_async import AsyncTokenCredential
+
+logger = logging.getLogger("scripts")
+
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+
+
+class CachingTokenCredential(AsyncTokenCredential):
+    """
+    Wraps an async credential and reuses its tokens until they are close to expiring.
+    Useful for credentials like AzureDeveloperCliCredential, which start a subprocess for every token request.
+    """
+
+    def __init__(self, credential: AsyncTokenCredential):
+        self.credential = credential
+        self._tokens: Dict[Tuple[Any, ...], AccessToken] = {}
+        self._locks: Dict[Tuple[Any, ...], asyncio.Lock] = {}
+
+    async def get_token(
+        self,
+        *scopes: str,
+        claims: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        enable_cae: bool = False,
+        **kwargs: Any,
+    ) -> AccessToken:
+        if claims:
+            # A claims challenge always needs a fresh token
+            return await self.credential.get_token(
+                *scopes, claims=claims, tenant_id=tenant_id, enable_cae=enable_cae, **kwargs
+            )
+        key = (tuple(sorted(scopes)), tenant_id, enable_cae)
+        token = self._tokens.get(key)
+        if token is not None and time.time() < token.expires_on - TOKEN_REFRESH_MARGIN:
+            return token
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another task may have refreshed the token while this one was waiting
+            token = self._tokens.get(key)
+            if token is None or time.time() >= token.expires_on - TOKEN_REFRESH_MARGIN:
+                token = await self.credential.get_token(*scopes, tenant_id=tenant_id, enable_cae=enable_cae, **kwargs)
+                self._tokens[key] = token
+        return token
+
+    async def warm(self, scopes: Iterable[str]) -> None:
+        """
+        Fetches a token for each scope concurrently, so services that are first used at the same time
+        don't each wait on their own token request.
+        Failures are only logged, the service call that needs the token will surface them.
+        """
+        scopes = list(scopes)
+        results = await asyncio.gather(*(self.get_token(scope) for scope in scopes), return_exceptions=True)
+        for scope, result in zip(scopes, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not prefetch a token for %s: %s", scope, result)
+
+    async def close(self) -> None:
+        await self.credential.close()
+
+    async def __aenter__(self) -> "CachingTokenCredential":
+        await self.credential.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]] = None,
+        exc_value: Optional[BaseException] = None,
+        traceback: Optional[TracebackType] = None,
+    ) -> None:
+        await self.credential.__aexit__(exc_type, exc_value, traceback)
@@ -1,5 +1,5 @@
 import csv
-from typing import IO, AsyncGenerator
+from typing import IO, AsyncGenerator, Optional
 
 from .page import Page
 from .parser import Parser
@@ -10,7 +10,7 @@ class CsvParser(Parser):
     Concrete parser that can parse CSV into Page objects. Each row becomes a Page object.
     """
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         # Check if content is in bytes (binary file) and decode to string
         content_str: str
         if isinstance(content, (bytes, bytearray)):
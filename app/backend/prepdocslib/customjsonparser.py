@@ -1,6 +1,10 @@
+import functools
+import io
+import itertools
 import json
 import logging
-from typing import IO, AsyncGenerator, Dict, Any, Optional
+import sys
+from typing import IO, Any, AsyncGenerator, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 import asyncio
 from datetime import datetime, timezone
 
@@ -15,8 +19,129 @@ except ImportError:
     dateutil_parser = None
     ParserError = Exception
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 logger = logging.getLogger(__name__)
 
+# orjson is optional, it decodes bytes several times faster than the json module.
+# Its JSONDecodeError subclasses json.JSONDecodeError, so errors are handled the same either way.
+json_loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads
+
+# Files at least this large are parsed in the default executor so they don't block the event loop
+EXECUTOR_PARSE_THRESHOLD_BYTES = 2 * 1024 * 1024 if orjson is not None else 64 * 1024
+
+# The item loop hands control back to the event loop after this many items, so other files keep making progress.
+# Large files are also streamed in batches of this many items
+ITEMS_PER_EVENT_LOOP_YIELD = 1000
+
+# When ijson is installed, files at least this large are streamed item by item instead of being decoded at once
+STREAMING_PARSE_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+def remaining_size(content: IO[bytes]) -> Optional[int]:
+    """Returns the number of bytes left to read in a seekable file, or None if it can't be determined."""
+    try:
+        position = content.tell()
+        size = content.seek(0, io.SEEK_END)
+        content.seek(position)
+        return size - position
+    except (AttributeError, OSError):
+        return None
+
+
+def should_stream(content: IO[bytes]) -> bool:
+    """Returns whether SpecificJsonParser streams the rest of this file item by item instead of decoding it at once."""
+    if ijson is None:
+        return False
+    size = remaining_size(content)
+    return size is not None and size >= STREAMING_PARSE_THRESHOLD_BYTES
+
+
+async def stream_items(content: IO[bytes], filename: str) -> AsyncGenerator[Tuple[int, Any], None]:
+    """
+    Yields (index, item) pairs from the 'value' list of a JSON file without decoding the whole file.
+    ijson parses synchronously, so items are read in batches in the default executor to keep the event loop free.
+    """
+    loop = asyncio.get_running_loop()
+    items = enumerate(ijson.items(content, "value.item"))
+    item_count = 0
+    while True:
+        try:
+            batch = await loop.run_in_executor(None, list, itertools.islice(items, ITEMS_PER_EVENT_LOOP_YIELD))
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON structure in file {filename}: {e}") from e
+        if not batch:
+            break
+        item_count += len(batch)
+        for index_and_item in batch:
+            yield index_and_item
+    if not item_count:
+        # Only the items are read, so a missing or non-list 'value' can't be told apart from an empty list
+        logger.warning("JSON file '%s' has no items in a 'value' list (missing, not a list or empty). Skipping.", filename)
+
+
+async def yield_items(items: Iterator[Tuple[int, Any]]) -> AsyncGenerator[Tuple[int, Any], None]:
+    """
+    Yields the (index, item) pairs of an already decoded file, handing control back to the event loop
+    after every ITEMS_PER_EVENT_LOOP_YIELD items so other files keep making progress.
+    """
+    for index, item in items:
+        if index and index % ITEMS_PER_EVENT_LOOP_YIELD == 0:
+            await asyncio.sleep(0)
+        yield index, item
+
+
+def release_items(value_list: List[Any]) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields (index, item) pairs, clearing each entry of the list once read so its unused fields
+    (and the dict itself) can be freed while the remaining items are processed instead of after the whole file.
+    """
+    for index in range(len(value_list)):
+        item, value_list[index] = value_list[index], None
+        yield index, item
+
+@functools.lru_cache(maxsize=4096)
+def convert_to_iso_utc(date_string: str) -> str:
+    """
+    Converts a date string in any format dateutil understands to ISO 8601 UTC, as required for Edm.DateTimeOffset.
+    Cached since exported files often repeat the same timestamps across many items.
+
+    Raises:
+        ParserError, ValueError, OverflowError: If the string is not a valid date.
+    """
+    # 1. Parse the date string, ISO 8601 dates (the common case) with the much faster
+    #    datetime.fromisoformat, anything else using dateutil (handles many formats)
+    try:
+        dt_obj = datetime.fromisoformat(date_string)
+    except ValueError:
+        dt_obj = dateutil_parser.parse(date_string)
+
+    # 2. Ensure the datetime object is timezone-aware and in UTC
+    if dt_obj.utcoffset() is None:
+        # Input was naive (no timezone). Assume it's UTC.
+        # If you know source is local time, you'd need to localize then convert.
+        dt_utc = dt_obj.replace(tzinfo=timezone.utc)
+    else:
+        # Input had timezone info. Convert it to UTC.
+        dt_utc = dt_obj.astimezone(timezone.utc)
+
+    # 3. Format to ISO 8601 with 'Z' specifier (required by Azure Search)
+    # Built directly from the fields since the format is fixed, strftime would parse the format string every call
+    return (
+        f"{dt_utc.year:04d}-{dt_utc.month:02d}-{dt_utc.day:02d}"
+        f"T{dt_utc.hour:02d}:{dt_utc.minute:02d}:{dt_utc.second:02d}Z"
+    )
+    # If you need millisecond precision, add f".{dt_utc.microsecond // 1000:03d}" before the 'Z'
+
+
 class SpecificJsonParser(Parser):
     """
     Parses JSON files expecting a specific structure.
@@ -36,9 +161,12 @@ class SpecificJsonParser(Parser):
     Yields a single Page object per item in the 'value' list.
     """
 
+    __slots__ = ("metadata_field_name", "updatedate_metadata_field")
+
     def __init__(self, metadata_field_name: str = "sourcefile", updatedate_metadata_field: str = "updatedate"):
-        self.metadata_field_name = metadata_field_name
-        self.updatedate_metadata_field = updatedate_metadata_field
+        # Interned since these are the keys of every page metadata dict, and are looked up again when building sections
+        self.metadata_field_name = sys.intern(metadata_field_name)
+        self.updatedate_metadata_field = sys.intern(updatedate_metadata_field)
         logger.info("SpecificJsonParser initialized to map JSON 'url' to '%s' and 'updatedate' to '%s' (converting to ISO 8601 UTC)",
                      self.metadata_field_name, self.updatedate_metadata_field)
         if dateutil_parser is None:
@@ -61,80 +189,84 @@ class SpecificJsonParser(Parser):
         filename_for_log = file_path or "unknown file"
         logger.debug("Parsing specific JSON structure from: %s", filename_for_log)
         try:
-            loop = asyncio.get_running_loop()
-            try:
-                json_content_bytes = content.read()
-                data = await loop.run_in_executor(None, json.loads, json_content_bytes)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON structure in file {filename_for_log}: {e}") from e
-            except Exception as e:
-                raise ValueError(f"Could not read or decode JSON file {filename_for_log}: {e}") from e
-
-            # --- Basic Structure Checks ---
-            if not isinstance(data, dict):
-                logger.error("JSON file '%s' did not parse into a dictionary. Skipping.", filename_for_log)
-                return
-            value_list = data.get("value")
-            if not isinstance(value_list, list):
-                logger.error("Key 'value' in JSON file '%s' is missing or not a list. Skipping.", filename_for_log)
-                return
-            if not value_list:
-                logger.warning("The list associated with key 'value' in JSON file '%s' is empty. Skipping.", filename_for_log)
-                return
+            # Checked once per file so per-item debug arguments are only built when they will be logged
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            items: AsyncIterator[Tuple[int, Any]]
+            if should_stream(content):
+                # Keeps memory use proportional to one batch of items instead of the whole file
+                logger.info("Streaming items from large JSON file %s (%d bytes)", filename_for_log, remaining_size(content))
+                items = stream_items(content, filename_for_log)
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    json_content_bytes = content.read()
+                    if len(json_content_bytes) < EXECUTOR_PARSE_THRESHOLD_BYTES:
+                        # Small files parse faster than the round trip to the thread pool
+                        data = json_loads(json_content_bytes)
+                    else:
+                        data = await loop.run_in_executor(None, json_loads, json_content_bytes)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON structure in file {filename_for_log}: {e}") from e
+                except Exception as e:
+                    raise ValueError(f"Could not read or decode JSON file {filename_for_log}: {e}") from e
+                # Drop the raw bytes now, so they aren't held for as long as this generator yields pages
+                del json_content_bytes
 
-            # --- Iterate through items in the 'value' list ---
-            for index, item_data in enumerate(value_list):
-                item_log_prefix = f"Item {index} in {filename_for_log}" # For clearer logging
+                # --- Basic Structure Checks ---
+                try:
+                    value_list = data["value"]
+                except (KeyError, TypeError):
+                    logger.error("JSON file '%s' is not an object with a 'value' key. Skipping.", filename_for_log)
+                    return
+                if not isinstance(value_list, list):
+                    logger.error("Key 'value' in JSON file '%s' is missing or not a list. Skipping.", filename_for_log)
+                    return
+                if not value_list:
+                    logger.warning("The list associated with key 'value' in JSON file '%s' is empty. Skipping.", filename_for_log)
+                    return
 
-                if not isinstance(item_data, dict):
-                    logger.error("%s is not a dictionary (object). Skipping item.", item_log_prefix)
-                    continue
+                # Only the items are needed from here on, the rest of the document can be freed
+                del data
+                items = yield_items(release_items(value_list))
 
-                logger.debug("Processing %s. Keys found: %s", item_log_prefix, list(item_data.keys()))
-                text_content = item_data.get("content")
-                file_url = item_data.get("url")
-                update_date_val = item_data.get("updatedate") # Original date string
+            # --- Iterate through items in the 'value' list ---
+            async for index, item_data in items:
+                item_log_prefix = f"Item {index} in {filename_for_log}" # For clearer logging
 
-                if not isinstance(text_content, str) or not text_content.strip():
-                    logger.error("'content' field is missing, empty, or not a string in %s. Skipping item.", item_log_prefix)
+                # Valid items are the common case, so look the fields up directly and handle bad shapes in one place:
+                # a non-object item raises TypeError, a missing 'content' KeyError and a non-string one AttributeError
+                try:
+                    text_content = item_data["content"]
+                    has_content = bool(text_content.strip())
+                    file_url = item_data.get("url")
+                    update_date_val = item_data.get("updatedate") # Original date string
+                except (KeyError, TypeError, AttributeError):
+                    has_content = False
+                if not has_content:
+                    logger.error("%s is not an object with a non-empty string 'content' field. Skipping item.", item_log_prefix)
                     continue
 
-                page_metadata: Dict[str, Any] = {}
+                if debug_enabled:
+                    logger.debug("Processing %s. Keys found: %s", item_log_prefix, item_data.keys())
 
                 # Process 'url'
                 if isinstance(file_url, str) and file_url.strip():
-                    page_metadata[self.metadata_field_name] = file_url
-                    logger.debug("Extracted '%s': %s from %s", self.metadata_field_name, file_url, item_log_prefix)
+                    if debug_enabled:
+                        logger.debug("Extracted '%s': %s from %s", self.metadata_field_name, file_url, item_log_prefix)
                 else:
+                    file_url = None
                     logger.warning("'url' field is missing/empty/not string in %s. Metadata '%s' will not be set.",
                                    item_log_prefix, self.metadata_field_name)
 
+                iso_date_string: Optional[str] = None
+
                 # --- Process 'updatedate' with CONVERSION ---
                 if dateutil_parser and isinstance(update_date_val, str) and update_date_val.strip():
                     try:
-                        # 1. Parse the date string using dateutil (handles many formats)
-                        dt_obj = dateutil_parser.parse(update_date_val)
-
-                        # 2. Ensure the datetime object is timezone-aware and in UTC
-                        if dt_obj.tzinfo is None or dt_obj.tzinfo.utcoffset(dt_obj) is None:
-                            # Input was naive (no timezone). Assume it's UTC.
-                            # If you know source is local time, you'd need to localize then convert.
-                            dt_utc = dt_obj.replace(tzinfo=timezone.utc)
-                            logger.debug("Parsed naive date '%s' as UTC for %s", update_date_val, item_log_prefix)
-                        else:
-                            # Input had timezone info. Convert it to UTC.
-                            dt_utc = dt_obj.astimezone(timezone.utc)
-                            logger.debug("Parsed timezone-aware date '%s' and converted to UTC for %s", update_date_val, item_log_prefix)
-
-                        # 3. Format to ISO 8601 with 'Z' specifier (required by Azure Search)
-                        # Use strftime for precise format control including 'Z'
-                        iso_date_string = dt_utc.strftime('%Y-%m-%dT%H:%M:%SZ')
-                        # If you need millisecond precision:
-                        # iso_date_string = dt_utc.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-
-                        page_metadata[self.updatedate_metadata_field] = iso_date_string
-                        logger.debug("Stored '%s': %s (converted from '%s') for %s",
-                                     self.updatedate_metadata_field, iso_date_string, update_date_val, item_log_prefix)
+                        iso_date_string = convert_to_iso_utc(update_date_val)
+                        if debug_enabled:
+                            logger.debug("Stored '%s': %s (converted from '%s') for %s",
+                                         self.updatedate_metadata_field, iso_date_string, update_date_val, item_log_prefix)
 
                     except (ParserError, ValueError, OverflowError) as e:
                         # Log error if parsing fails
@@ -153,6 +285,17 @@ class SpecificJsonParser(Parser):
                     logger.warning("'updatedate' field is missing, empty, or not a string ('%s') in %s. Metadata '%s' will not be set.",
                                    update_date_val, item_log_prefix, self.updatedate_metadata_field)
 
+                # Build the metadata in one go, both fields are present for most items
+                page_metadata: Dict[str, Any]
+                if file_url is not None and iso_date_string is not None:
+                    page_metadata = {self.metadata_field_name: file_url, self.updatedate_metadata_field: iso_date_string}
+                elif file_url is not None:
+                    page_metadata = {self.metadata_field_name: file_url}
+                elif iso_date_string is not None:
+                    page_metadata = {self.updatedate_metadata_field: iso_date_string}
+                else:
+                    page_metadata = {}
+
                 # Create Page object for this item
                 page = Page(
                     page_num=index, # Use index as page number
@@ -160,7 +303,8 @@ class SpecificJsonParser(Parser):
                     text=text_content,
                     metadata=page_metadata
                 )
-                logger.debug("Yielding Page %d for %s", index, item_log_prefix)
+                if debug_enabled:
+                    logger.debug("Yielding Page %d for %s", index, item_log_prefix)
                 yield page
 
         except ValueError as e:
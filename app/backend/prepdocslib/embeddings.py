@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import logging
 from abc import ABC
 from typing import Awaitable, Callable, List, Optional, Union
@@ -19,6 +21,9 @@ from typing_extensions import TypedDict
 
 logger = logging.getLogger("scripts")
 
+# Number of embedding batches sent to the service at the same time
+EMBEDDING_BATCH_CONCURRENCY = 5
+
 
 class EmbeddingBatch:
     """
@@ -98,27 +103,36 @@ class OpenAIEmbeddings(ABC):
         return batches
 
     async def create_embedding_batch(self, texts: List[str], dimensions_args: ExtraArgs) -> List[List[float]]:
-        batches = self.split_text_into_batches(texts)
-        embeddings = []
+        # Batching the longest texts first packs the token budget more evenly,
+        # the embeddings are put back in input order once every batch is done
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]), reverse=True)
+        batches = self.split_text_into_batches([texts[index] for index in order])
         client = await self.create_client()
-        for batch in batches:
-            async for attempt in AsyncRetrying(
-                retry=retry_if_exception_type(RateLimitError),
-                wait=wait_random_exponential(min=15, max=60),
-                stop=stop_after_attempt(15),
-                before_sleep=self.before_retry_sleep,
-            ):
-                with attempt:
-                    emb_response = await client.embeddings.create(
-                        model=self.open_ai_model_name, input=batch.texts, **dimensions_args
-                    )
-                    embeddings.extend([data.embedding for data in emb_response.data])
-                    logger.info(
-                        "Computed embeddings in batch. Batch size: %d, Token count: %d",
-                        len(batch.texts),
-                        batch.token_length,
-                    )
+        semaphore = asyncio.Semaphore(EMBEDDING_BATCH_CONCURRENCY)
 
+        async def embed_batch(batch: EmbeddingBatch) -> List[List[float]]:
+            async with semaphore:
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(RateLimitError),
+                    wait=wait_random_exponential(min=15, max=60),
+                    stop=stop_after_attempt(15),
+                    before_sleep=self.before_retry_sleep,
+                ):
+                    with attempt:
+                        emb_response = await client.embeddings.create(
+                            model=self.open_ai_model_name, input=batch.texts, **dimensions_args
+                        )
+                        logger.info(
+                            "Computed embeddings in batch. Batch size: %d, Token count: %d",
+                            len(batch.texts),
+                            batch.token_length,
+                        )
+            return [data.embedding for data in emb_response.data]
+
+        batch_embeddings = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        embeddings: List[List[float]] = [[] for _ in texts]
+        for index, embedding in zip(order, itertools.chain.from_iterable(batch_embeddings)):
+            embeddings[index] = embedding
         return embeddings
 
     async def create_embedding_single(self, text: str, dimensions_args: ExtraArgs) -> List[float]:
@@ -145,10 +159,17 @@ class OpenAIEmbeddings(ABC):
             else {}
         )
 
+        # Identical texts, like headers or boilerplate repeated across files, are only embedded once
+        unique_texts = list(dict.fromkeys(texts))
         if not self.disable_batch and self.open_ai_model_name in OpenAIEmbeddings.SUPPORTED_BATCH_AOAI_MODEL:
-            return await self.create_embedding_batch(texts, dimensions_args)
+            unique_embeddings = await self.create_embedding_batch(unique_texts, dimensions_args)
+        else:
+            unique_embeddings = [await self.create_embedding_single(text, dimensions_args) for text in unique_texts]
 
-        return [await self.create_embedding_single(text, dimensions_args) for text in texts]
+        if len(unique_texts) == len(texts):
+            return unique_embeddings
+        embedding_by_text = dict(zip(unique_texts, unique_embeddings))
+        return [embedding_by_text[text] for text in texts]
 
 
 class AzureOpenAIEmbeddingService(OpenAIEmbeddings):
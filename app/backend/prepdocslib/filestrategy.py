@@ -1,11 +1,15 @@
 # prepdocslib/filestrategy.py
+import asyncio
+import io
 import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import List, Optional, Dict, Any # Added Dict, Any
 
 from azure.core.credentials import AzureKeyCredential
 
 # Assuming these imports are correct relative to your project structure
 from .blobmanager import BlobManager
+from .customjsonparser import SpecificJsonParser, should_stream
 from .embeddings import ImageEmbeddings, OpenAIEmbeddings
 from .fileprocessor import FileProcessor
 # Assuming File provides filename(), content(), url(), file_extension(), close(), acls
@@ -16,17 +20,34 @@ from .searchmanager import SearchManager, Section
 from .strategy import DocumentAction, SearchInfo, Strategy
 # Import Page to access its metadata attribute
 from .page import Page
-# Import SplitPage for type hinting
-from .textsplitter import SplitPage
+from .parser import Parser
+from .pdfparser import DocumentAnalysisParser
 
 logger = logging.getLogger("scripts") # Use the logger name from your main script
 
+# Sections of files without image embeddings are uploaded together once this many are pending,
+# so small files share search upload and embedding requests
+SECTION_UPLOAD_BATCH_SIZE = 1000
+
+
+def parse_pages_in_process(parser: Parser, data: bytes, filename: str) -> List[Page]:
+    """
+    Runs a parser to completion inside a worker process.
+    The parser is pickled to get here, so it must not hold network clients or credentials.
+    """
+
+    async def collect_pages() -> List[Page]:
+        return [page async for page in parser.parse(content=io.BytesIO(data), file_path=filename)]
+
+    return asyncio.run(collect_pages())
+
 
 async def parse_file(
     file: File,
     file_processors: dict[str, FileProcessor],
     category: Optional[str] = None,
     image_embeddings: Optional[ImageEmbeddings] = None, # Keep param, even if unused in this specific func
+    executor: Optional[Executor] = None,
 ) -> List[Section]:
     """
     Parses a File object using the appropriate parser and splitter,
@@ -37,6 +58,9 @@ async def parse_file(
         file_processors (dict): Dictionary mapping file extensions to FileProcessors.
         category (Optional[str]): Optional category to assign to sections.
         image_embeddings (Optional[ImageEmbeddings]): Passed through but not used here.
+        executor (Optional[Executor]): Process pool used to run CPU-bound parsers off the event loop.
+            Document Intelligence parsing is network-bound and always stays on the event loop,
+            as do JSON files large enough for SpecificJsonParser to stream.
 
     Returns:
         List[Section]: A list of Section objects ready for indexing, including metadata.
@@ -57,7 +81,18 @@ async def parse_file(
         # Pass filename to parser if it accepts it (our SpecificJsonParser does via file_path)
         # Check if parse method accepts file_path kwarg, adapt if necessary
         # For simplicity assuming it does or ignores unknown kwargs
-        pages = [page async for page in processor.parser.parse(content=file.content, file_path=filename)]
+        # Large JSON files stay on the event loop too, the process pool would need the whole file in memory
+        # and SpecificJsonParser streams those item by item
+        if (
+            executor is not None
+            and not isinstance(processor.parser, DocumentAnalysisParser)
+            and not (isinstance(processor.parser, SpecificJsonParser) and should_stream(file.content))
+        ):
+            pages = await asyncio.get_running_loop().run_in_executor(
+                executor, parse_pages_in_process, processor.parser, file.content.read(), filename
+            )
+        else:
+            pages = [page async for page in processor.parser.parse(content=file.content, file_path=filename)]
     except Exception as e:
         logger.error("Error during parsing of file '%s': %s", filename, e)
         # Optionally re-raise or return empty list depending on desired behavior
@@ -72,31 +107,33 @@ async def parse_file(
     metadata_lookup: Dict[int, Dict[str, Any]] = {p.page_num: p.metadata for p in pages if p.metadata}
     if metadata_lookup:
          #logger.debug("Metadata found on parsed pages for %s: %s", filename, metadata_lookup)
-         logger.debug(f"Metadata found on parsed pages for {filename}")
+         logger.debug("Metadata found on parsed pages for %s", filename)
 
     sections: List[Section] = []
     try:
         # Use the splitter to get SplitPage objects from the parsed Pages
-        logger.info(f"Splitting '%s' into sections..., {filename} {type(processor.splitter).__name__}")
+        logger.info("Splitting '%s' into sections using %s", filename, type(processor.splitter).__name__)
 
         # --- Consume the splitter output iteratively ---
         # This assumes split_pages yields SplitPage objects or returns an iterable of them.
-        split_page_count = 0
         # Call the splitter - it might return a list OR a generator
         split_iterable = processor.splitter.split_pages(pages)
 
         # Iterate through the results regardless of whether it's a list or generator
+        get_page_metadata = metadata_lookup.get # Bound once, this runs for every section of every file
         for split_page in split_iterable:
-            split_page_count += 1
             section = Section(split_page, content=file, category=category)
-            original_page_metadata = metadata_lookup.get(split_page.page_num)
-            section.metadata = original_page_metadata.copy() if original_page_metadata else {}
+            # Sections only read their metadata (see Section.to_search_dict), so all sections of a page share its dict.
+            # Sections of pages without metadata keep the empty dict Section.__init__ already created.
+            original_page_metadata = get_page_metadata(split_page.page_num)
+            if original_page_metadata:
+                section.metadata = original_page_metadata
             sections.append(section)
         # --- End iterative consumption ---
 
-        logger.info("Finished splitting '%s', generated %d sections", filename, split_page_count)
+        logger.info("Finished splitting '%s', generated %d sections", filename, len(sections))
         if not sections and pages:
-             logger.warning(...) # Keep warning
+             logger.warning("File '%s' was parsed into %d pages, but splitting resulted in 0 sections.", filename, len(pages))
 
     except TypeError as te:
         # Catch the specific TypeError if it happens here
@@ -112,37 +149,6 @@ async def parse_file(
         logger.error("Unexpected error during splitting of file '%s': %s", filename, e)
         return []
 
-        # Assuming split_pages takes list of Page objects
-        split_pages_results: List[SplitPage] = processor.splitter.split_pages(pages)
-        split_page_count = len(split_pages_results)
-        logger.info("Split '%s' into %d potential sections", filename, split_page_count)
-
-        for split_page in split_pages_results:
-            # Create the Section object using the constructor defined in searchmanager.py
-            # It takes SplitPage and the original File object
-            section = Section(split_page, content=file, category=category)
-
-            # Retrieve metadata using the lookup based on the original page number
-            # and assign it to the section's metadata attribute.
-            original_page_metadata = metadata_lookup.get(split_page.page_num)
-            if original_page_metadata:
-                section.metadata = original_page_metadata.copy() # Assign a copy
-                logger.debug("Assigned metadata %s to section from page %d of '%s'",
-                             original_page_metadata, split_page.page_num, filename)
-            else:
-                # Ensure metadata is always at least an empty dict
-                section.metadata = {}
-
-            sections.append(section)
-
-        if not sections and pages:
-             logger.warning("File '%s' was parsed into %d pages, but splitting resulted in 0 sections.", filename, len(pages))
-
-    except Exception as e:
-        logger.error("Error during splitting of file '%s': %s", filename, e)
-        # Optionally re-raise or return empty list
-        return [] # Stop processing this file on splitting error
-
     # Warning about image embeddings granularity (keep as is)
     if image_embeddings and len(pages) > 1:
          logger.warning("Each page was split into smaller chunks of text, but image embeddings (if used) might relate to the entire page.")
@@ -170,10 +176,13 @@ class FileStrategy(Strategy):
         category: Optional[str] = None,
         use_content_understanding: bool = False, # Keep CU params if needed
         content_understanding_endpoint: Optional[str] = None,
+        parse_workers: Optional[int] = None,
+        max_concurrency: int = 1,
     ):
         self.list_file_strategy = list_file_strategy
         self.blob_manager = blob_manager
-        self.file_processors = file_processors
+        # Normalized once here, parse_file looks processors up by the lower-cased file extension
+        self.file_processors = {extension.lower(): processor for extension, processor in file_processors.items()}
         self.document_action = document_action
         self.embeddings = embeddings
         self.image_embeddings = image_embeddings
@@ -183,6 +192,16 @@ class FileStrategy(Strategy):
         self.category = category
         self.use_content_understanding = use_content_understanding
         self.content_understanding_endpoint = content_understanding_endpoint
+        # Number of processes used to parse files, or None to parse on the event loop
+        self.parse_workers = parse_workers
+        # Number of files that go through parse, split, embed and upload at the same time
+        self.max_concurrency = max_concurrency
+        # Sections waiting to be uploaded with those of other files, see queue_sections
+        self.pending_sections: List[Section] = []
+        # Names of the files whose sections are in pending_sections
+        self.pending_files: List[str] = []
+        # Names of files that were queued but whose batch failed to upload, see flush_sections
+        self.failed_upload_files: List[str] = []
         # Instantiate SearchManager here or within run()
         # Passing necessary flags based on self attributes
         self.search_manager = SearchManager(
@@ -212,87 +231,152 @@ class FileStrategy(Strategy):
             await cu_manager.create_analyzer()
 
 
+    async def add_file(self, file: File, file_count: int, executor: Optional[Executor] = None) -> bool:
+        """Parses, splits and indexes a single file, returning whether it was processed successfully."""
+        sections = [] # Ensure sections is reset for each file
+        filename = file.filename() # Get filename early for logging
+        logger.info("Processing file %d: %s", file_count, filename)
+        try:
+            # Call the modified parse_file, which handles metadata transfer
+            sections = await parse_file(
+                file, self.file_processors, self.category, self.image_embeddings, executor
+            )
+
+            if sections:
+                logger.debug("Generated %d sections for file %s", len(sections), filename)
+                # --- CRITICAL: Generate Section IDs before uploading ---
+                for i, section in enumerate(sections):
+                     try:
+                        section.create_section_id(section_index=i)
+                     except Exception as id_err:
+                         logger.error("Error generating ID for section %d of file %s: %s. Skipping section.", i, filename, id_err)
+                         # Remove section if ID generation failed? Or handle differently?
+                         # For now, let's assume it might proceed without ID, causing upload failure later.
+
+                # Upload blob (optional, based on strategy needs)
+                blob_sas_uris = None
+                if self.blob_manager: # Check if blob manager is configured/needed
+                    try:
+                        blob_sas_uris = await self.blob_manager.upload_blob(file)
+                        logger.debug("Uploaded blob for %s", filename)
+                    except Exception as blob_err:
+                        logger.error("Failed to upload blob for %s: %s", filename, blob_err)
+                        # Decide if this is a fatal error for the file or just a warning
+
+                # Get image embeddings (optional)
+                blob_image_embeddings: Optional[List[List[float]]] = None
+                if self.image_embeddings and blob_sas_uris:
+                     try:
+                        logger.debug("Generating image embeddings for %s", filename)
+                        blob_image_embeddings = await self.image_embeddings.create_embeddings(blob_sas_uris)
+                     except Exception as img_emb_err:
+                         logger.error("Failed to create image embeddings for %s: %s", filename, img_emb_err)
+
+                # Update search index - SearchManager now handles metadata via Section
+                # Pass the list of Section objects (which now contain metadata and IDs)
+                if blob_image_embeddings:
+                    # Image embeddings are looked up by page number, so these sections can't be mixed with other files
+                    await self.search_manager.update_content(sections, blob_image_embeddings)
+                else:
+                    # A failed batch upload is recorded in failed_upload_files, not charged to this file
+                    await self.queue_sections(filename, sections)
+                return True
+            else:
+                logger.warning("No sections generated for file: %s. Skipping upload.", filename)
+                # Consider if this should count as failed or just skipped
+                return False # Count as failed if parsing/splitting produced nothing
+
+        except Exception as e:
+             logger.exception("Failed to process file %s during 'Add' action: %s", filename, e)
+             return False
+        finally:
+            # Ensure file handles are closed
+            if file:
+                try:
+                    file.close()
+                except Exception as close_err:
+                    logger.warning("Error closing file %s: %s", filename, close_err)
+
+    async def queue_sections(self, filename: str, sections: List[Section]):
+        """Adds a file's sections to the pending upload batch, uploading the batch once it is full."""
+        self.pending_sections.extend(sections)
+        self.pending_files.append(filename)
+        if len(self.pending_sections) >= SECTION_UPLOAD_BATCH_SIZE:
+            await self.flush_sections()
+
+    async def flush_sections(self):
+        """
+        Uploads all pending sections.
+        If the upload fails, every file in the batch is added to failed_upload_files instead of raising,
+        since those files were already reported as processed by add_file.
+        """
+        # Swapped out before awaiting, so files finishing meanwhile start a new batch
+        sections, self.pending_sections = self.pending_sections, []
+        filenames, self.pending_files = self.pending_files, []
+        if not sections:
+            return
+        try:
+            await self.search_manager.update_content(sections)
+        except Exception as e:
+            logger.exception("Failed to upload the sections of %d file(s) %s: %s", len(filenames), filenames, e)
+            self.failed_upload_files.extend(filenames)
+
+    async def remove_file(self, path: str):
+        """Removes the sections (and blobs, if uploaded) of a single file."""
+        # SearchManager.remove_content uses 'sourcefile' which is handled correctly now
+        await self.search_manager.remove_content(path)
+        if self.blob_manager:
+            try:
+                await self.blob_manager.remove_blob(path)
+            except Exception as blob_rem_err:
+                 logger.error("Failed to remove blob for path %s: %s", path, blob_rem_err)
+
     async def run(self):
         """Executes the strategy based on the document_action."""
 
         if self.document_action == DocumentAction.Add:
             logger.info("Starting 'Add' document action using FileStrategy.")
+            # Batches and failures are counted per run, in case the same strategy runs again
+            self.pending_sections = []
+            self.pending_files = []
+            self.failed_upload_files = []
             files = self.list_file_strategy.list()
             file_count = 0
             processed_files = 0
             failed_files = 0
-            async for file in files:
-                file_count += 1
-                sections = [] # Ensure sections is reset for each file
-                filename = file.filename() # Get filename early for logging
-                logger.info(f"Processing file {file_count}: {filename}")
-                try:
-                    # Call the modified parse_file, which handles metadata transfer
-                    sections = await parse_file(file, self.file_processors, self.category, self.image_embeddings)
-
-                    if sections:
-                        logger.debug("Generated %d sections for file %s", len(sections), filename)
-                        # --- CRITICAL: Generate Section IDs before uploading ---
-                        for i, section in enumerate(sections):
-                             try:
-                                section.create_section_id(section_index=i)
-                             except Exception as id_err:
-                                 logger.error("Error generating ID for section %d of file %s: %s. Skipping section.", i, filename, id_err)
-                                 # Remove section if ID generation failed? Or handle differently?
-                                 # For now, let's assume it might proceed without ID, causing upload failure later.
-
-                        # Upload blob (optional, based on strategy needs)
-                        blob_sas_uris = None
-                        if self.blob_manager: # Check if blob manager is configured/needed
-                            try:
-                                blob_sas_uris = await self.blob_manager.upload_blob(file)
-                                logger.debug("Uploaded blob for %s", filename)
-                            except Exception as blob_err:
-                                logger.error("Failed to upload blob for %s: %s", filename, blob_err)
-                                # Decide if this is a fatal error for the file or just a warning
-
-                        # Get image embeddings (optional)
-                        blob_image_embeddings: Optional[List[List[float]]] = None
-                        if self.image_embeddings and blob_sas_uris:
-                             try:
-                                logger.debug("Generating image embeddings for %s", filename)
-                                blob_image_embeddings = await self.image_embeddings.create_embeddings(blob_sas_uris)
-                             except Exception as img_emb_err:
-                                 logger.error("Failed to create image embeddings for %s: %s", filename, img_emb_err)
-
-                        # Update search index - SearchManager now handles metadata via Section
-                        # Pass the list of Section objects (which now contain metadata and IDs)
-                        await self.search_manager.update_content(sections, blob_image_embeddings)
-                        processed_files += 1
-                    else:
-                        logger.warning("No sections generated for file: %s. Skipping upload.", filename)
-                        # Consider if this should count as failed or just skipped
-                        failed_files += 1 # Count as failed if parsing/splitting produced nothing
-
-                except Exception as e:
-                     logger.exception("Failed to process file %s during 'Add' action: %s", filename, e)
-                     failed_files += 1
-                finally:
-                    # Ensure file handles are closed
-                    if file:
-                        try:
-                            file.close()
-                        except Exception as close_err:
-                            logger.warning("Error closing file %s: %s", filename, close_err)
+            executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            tasks: List[asyncio.Task[bool]] = []
+            try:
+                async for file in files:
+                    file_count += 1
+                    # Wait for a free slot before starting the next file, so open files and in-flight requests stay bounded
+                    await semaphore.acquire()
+                    task = asyncio.create_task(self.add_file(file, file_count, executor))
+                    task.add_done_callback(lambda _: semaphore.release())
+                    tasks.append(task)
+                results = await asyncio.gather(*tasks)
+                await self.flush_sections()
+                # Files whose batch failed to upload were counted as processed by add_file
+                processed_files = sum(results) - len(self.failed_upload_files)
+                failed_files = len(results) - processed_files
+            finally:
+                if executor is not None:
+                    executor.shutdown()
 
             logger.info(f"FileStrategy 'Add' completed. Processed: {processed_files}, Failed/Skipped: {failed_files}, Total Files: {file_count}")
 
         elif self.document_action == DocumentAction.Remove:
             logger.info("Starting 'Remove' document action using FileStrategy.")
             paths = self.list_file_strategy.list_paths()
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            remove_tasks: List[asyncio.Task[None]] = []
             async for path in paths:
-                 # SearchManager.remove_content uses 'sourcefile' which is handled correctly now
-                 await self.search_manager.remove_content(path)
-                 if self.blob_manager:
-                     try:
-                         await self.blob_manager.remove_blob(path)
-                     except Exception as blob_rem_err:
-                          logger.error("Failed to remove blob for path %s: %s", path, blob_rem_err)
+                await semaphore.acquire()
+                remove_task = asyncio.create_task(self.remove_file(path))
+                remove_task.add_done_callback(lambda _: semaphore.release())
+                remove_tasks.append(remove_task)
+            await asyncio.gather(*remove_tasks)
 
         elif self.document_action == DocumentAction.RemoveAll:
             logger.info("Starting 'RemoveAll' document action using FileStrategy.")
@@ -318,7 +402,7 @@ class UploadUserFileStrategy:
         embeddings: Optional[OpenAIEmbeddings] = None,
         image_embeddings: Optional[ImageEmbeddings] = None,
     ):
-        self.file_processors = file_processors
+        self.file_processors = {extension.lower(): processor for extension, processor in file_processors.items()}
         self.embeddings = embeddings
         self.image_embeddings = image_embeddings
         self.search_info = search_info
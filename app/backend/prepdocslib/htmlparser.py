@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import IO, AsyncGenerator
+from typing import IO, AsyncGenerator, Optional
 
 from bs4 import BeautifulSoup
 
@@ -30,11 +30,12 @@ def cleanup_data(data: str) -> str:
 class LocalHTMLParser(Parser):
     """Parses HTML text into Page objects."""
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         """Parses the given content.
         To learn more, please visit https://pypi.org/project/beautifulsoup4/
         Args:
             content (IO): The content to parse.
+            file_path (Optional[str]): The name of the file the content was read from.
         Returns:
             Page: The parsed html Page.
         """
@@ -1,5 +1,5 @@
 import json
-from typing import IO, AsyncGenerator
+from typing import IO, AsyncGenerator, Optional
 
 from .page import Page
 from .parser import Parser
@@ -10,7 +10,7 @@ class JsonParser(Parser):
     Concrete parser that can parse JSON into Page objects. A top-level object becomes a single Page, while a top-level array becomes multiple Page objects.
     """
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         offset = 0
         data = json.loads(content.read())
         if isinstance(data, list):
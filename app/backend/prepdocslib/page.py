@@ -11,6 +11,10 @@ class Page:
         metadata (Dict[str, Any]): Optional dictionary to hold metadata associated with the page.
     """
 
+    # One Page is created per item of every JSON file, so skip the per-instance __dict__.
+    # Declared by hand since dataclass(slots=True) needs Python 3.10
+    __slots__ = ("page_num", "offset", "text", "metadata")
+
     def __init__(self, page_num: int, offset: int, text: str, metadata: Optional[Dict[str, Any]] = None):
         self.page_num = page_num
         self.offset = offset
@@ -27,6 +31,8 @@ class SplitPage:
         text (str): The text of the section
     """
 
+    __slots__ = ("page_num", "text")
+
     def __init__(self, page_num: int, text: str):
         self.page_num = page_num
         self.text = text
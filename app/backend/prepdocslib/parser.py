@@ -1,14 +1,18 @@
 from abc import ABC
-from typing import IO, AsyncGenerator
+from typing import IO, AsyncGenerator, Optional
 
 from .page import Page
 
 
 class Parser(ABC):
     """
-    Abstract parser that parses content into Page objects
+    Abstract parser that parses content into Page objects.
+    file_path is the name of the file the content was read from, since content can be an in-memory copy without a name
     """
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    # Empty so subclasses that declare __slots__ don't get a __dict__ anyway
+    __slots__ = ()
+
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         if False:
             yield  # pragma: no cover - this is necessary for mypy to type check
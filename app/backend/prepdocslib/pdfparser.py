@@ -1,8 +1,9 @@
+import asyncio
 import html
 import io
 import logging
 from enum import Enum
-from typing import IO, AsyncGenerator, Union
+from typing import IO, AsyncGenerator, Optional, Union
 
 import pymupdf
 from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
@@ -31,8 +32,8 @@ class LocalPdfParser(Parser):
     To learn more, please visit https://pypi.org/project/pypdf/
     """
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
-        logger.info("Extracting text from '%s' using local PDF parser (pypdf)", content.name)
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
+        logger.info("Extracting text from '%s' using local PDF parser (pypdf)", file_path or content.name)
 
         reader = PdfReader(content)
         pages = reader.pages
@@ -56,56 +57,67 @@ class DocumentAnalysisParser(Parser):
         model_id="prebuilt-layout",
         use_content_understanding=True,
         content_understanding_endpoint: Union[str, None] = None,
+        max_concurrency: int = 8,
     ):
         self.model_id = model_id
         self.endpoint = endpoint
         self.credential = credential
         self.use_content_understanding = use_content_understanding
         self.content_understanding_endpoint = content_understanding_endpoint
+        self.max_concurrency = max_concurrency
+        # Created on first use so it belongs to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         logger.info("Extracting text from '%s' using Azure Document Intelligence", content.name)
 
         async with DocumentIntelligenceClient(
             endpoint=self.endpoint, credential=self.credential
         ) as document_intelligence_client:
-            file_analyzed = False
-            if self.use_content_understanding:
-                if self.content_understanding_endpoint is None:
-                    raise ValueError("Content Understanding is enabled but no endpoint was provided")
-                if isinstance(self.credential, AzureKeyCredential):
-                    raise ValueError(
-                        "AzureKeyCredential is not supported for Content Understanding, use keyless auth instead"
-                    )
-                cu_describer = ContentUnderstandingDescriber(self.content_understanding_endpoint, self.credential)
-                content_bytes = content.read()
-                try:
-                    poller = await document_intelligence_client.begin_analyze_document(
-                        model_id="prebuilt-layout",
-                        analyze_request=AnalyzeDocumentRequest(bytes_source=content_bytes),
-                        output=["figures"],
-                        features=["ocrHighResolution"],
-                        output_content_format="markdown",
-                    )
-                    doc_for_pymupdf = pymupdf.open(stream=io.BytesIO(content_bytes))
-                    file_analyzed = True
-                except HttpResponseError as e:
-                    content.seek(0)
-                    if e.error and e.error.code == "InvalidArgument":
-                        logger.error(
-                            "This document type does not support media description. Proceeding with standard analysis."
+            # Bound the number of documents being analyzed at once, since files are processed concurrently
+            async with self._get_semaphore():
+                file_analyzed = False
+                if self.use_content_understanding:
+                    if self.content_understanding_endpoint is None:
+                        raise ValueError("Content Understanding is enabled but no endpoint was provided")
+                    if isinstance(self.credential, AzureKeyCredential):
+                        raise ValueError(
+                            "AzureKeyCredential is not supported for Content Understanding, use keyless auth instead"
                         )
-                    else:
-                        logger.error(
-                            "Unexpected error analyzing document for media description: %s. Proceeding with standard analysis.",
-                            e,
+                    cu_describer = ContentUnderstandingDescriber(self.content_understanding_endpoint, self.credential)
+                    content_bytes = content.read()
+                    try:
+                        poller = await document_intelligence_client.begin_analyze_document(
+                            model_id="prebuilt-layout",
+                            analyze_request=AnalyzeDocumentRequest(bytes_source=content_bytes),
+                            output=["figures"],
+                            features=["ocrHighResolution"],
+                            output_content_format="markdown",
                         )
+                        doc_for_pymupdf = pymupdf.open(stream=io.BytesIO(content_bytes))
+                        file_analyzed = True
+                    except HttpResponseError as e:
+                        content.seek(0)
+                        if e.error and e.error.code == "InvalidArgument":
+                            logger.error(
+                                "This document type does not support media description. Proceeding with standard analysis."
+                            )
+                        else:
+                            logger.error(
+                                "Unexpected error analyzing document for media description: %s. Proceeding with standard analysis.",
+                                e,
+                            )
 
-            if file_analyzed is False:
-                poller = await document_intelligence_client.begin_analyze_document(
-                    model_id=self.model_id, analyze_request=content, content_type="application/octet-stream"
-                )
-            analyze_result: AnalyzeResult = await poller.result()
+                if file_analyzed is False:
+                    poller = await document_intelligence_client.begin_analyze_document(
+                        model_id=self.model_id, analyze_request=content, content_type="application/octet-stream"
+                    )
+                analyze_result: AnalyzeResult = await poller.result()
 
             offset = 0
             for page in analyze_result.pages:
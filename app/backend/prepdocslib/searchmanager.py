@@ -3,8 +3,13 @@ import logging
 import os
 import re
 import base64
+import functools
+import math
+import random
 from typing import List, Optional, Dict, Any
 
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.search.documents.aio import SearchClient
 from azure.search.documents.indexes.models import (
     AzureOpenAIVectorizer,
     AzureOpenAIVectorizerParameters,
@@ -23,6 +28,7 @@ from azure.search.documents.indexes.models import (
     VectorSearchProfile,
     VectorSearchVectorizer,
 )
+from azure.search.documents.models import IndexingResult
 
 from .blobmanager import BlobManager
 from .embeddings import AzureOpenAIEmbeddingService, OpenAIEmbeddings
@@ -32,6 +38,37 @@ from .textsplitter import SplitPage
 
 logger = logging.getLogger("scripts")
 
+# Number of section batches of a single update_content call that are embedded and uploaded at the same time
+UPLOAD_BATCH_CONCURRENCY = 4
+
+# Largest number of documents sent in one upload request, the service accepts at most 1000
+MAX_UPLOAD_BATCH_SIZE = 1000
+# Status codes the service returns when it is throttling, these uploads are retried with a smaller batch
+THROTTLED_STATUS_CODES = (429, 503)
+UPLOAD_MAX_RETRIES = 6
+# Backoff before a retry is random between 0 and min(UPLOAD_MAX_BACKOFF, UPLOAD_BACKOFF_BASE * 2**attempt) seconds
+UPLOAD_BACKOFF_BASE = 1.0
+UPLOAD_MAX_BACKOFF = 30.0
+# After this many uploads in a row succeed, the upload batch size grows by 10%
+UPLOAD_GROWTH_SUCCESSES = 10
+
+# Number of search pages or delete requests of remove_content that are sent at the same time
+REMOVE_CONCURRENCY = 4
+# Largest skip value the search service accepts when paging through results
+MAX_SEARCH_SKIP = 100000
+
+# Characters that are replaced in the file name part of section ids
+SECTION_ID_UNSAFE_CHARS = re.compile(r'[^\w\-]+')
+
+# Fields of a search document that are set by the section itself and never taken from its metadata
+SECTION_CORE_FIELDS = frozenset({"id", "content", "category", "sourcepage", "sourcefile", "storageUrl"})
+
+
+@functools.lru_cache(maxsize=1024)
+def section_id_prefix(source_id: str) -> str:
+    """Returns the cleaned file name used in section ids, the sections of a file all share it."""
+    return SECTION_ID_UNSAFE_CHARS.sub('_', os.path.basename(source_id))
+
 
 class Section:
     """
@@ -45,42 +82,20 @@ class Section:
         self.category = category
         self.metadata: Dict[str, Any] = {}
         self.id: Optional[str] = None
-        # Store filename and URL for easier access
+        # Store filename and URL for easier access, sections of files without a URL fall back to the filename
         self.filename: str = content.filename()
-        # Attempt to get URL, fall back to empty string or filename if needed
-        retrieved_url = getattr(content, 'url', None) # Get 'url' attribute, default to None if absent
-        if callable(retrieved_url):
-            try:
-                self.url = retrieved_url() # Call it if it's a method
-            except Exception as e:
-                logger.warning(f"Error calling url() method for file {self.filename}: {e}. Falling back to filename.")
-                self.url = self.filename # Fallback on error
-        elif isinstance(retrieved_url, str):
-             self.url = retrieved_url # Use it directly if it's already a string
-        else:
-             # If retrieved_url is None or some other non-callable/non-string type, fallback to filename
-             self.url = self.filename
-        # Ensure URL is never None if filename is valid
-        self.url = self.url or self.filename
+        self.url: str = content.url or self.filename
 
     def create_section_id(self, section_index: int) -> str:
         """Creates a unique, URL-safe ID for this section."""
         # Use URL if available and seems more stable, otherwise filename
-        source_id = self.url or self.filename
-        # Basic cleaning and replace non-alphanum characters (excluding hyphen needed for structure)
-        filename_safe = re.sub(r'[^\w\-]+', '_', os.path.basename(source_id)) # Use basename
+        filename_safe = section_id_prefix(self.url or self.filename)
 
         # Construct the core ID string
         id_str = f"{filename_safe}-page{self.split_page.page_num}-s{section_index}"
 
         # Base64 encode for safety and length, remove padding
-        try:
-            self.id = base64.urlsafe_b64encode(id_str.encode()).decode().rstrip("=")
-        except Exception as e:
-             logger.warning("Failed to generate base64 ID for '%s', using plain ID. Error: %s", id_str, e)
-             # Fallback to a simpler, potentially less safe ID if encoding fails
-             self.id = id_str[:512] # Limit length as fallback
-
+        self.id = base64.urlsafe_b64encode(id_str.encode()).decode().rstrip("=")
         return self.id
 
     def to_search_dict(self, use_image_sourcepage: bool = False) -> Dict[str, Any]:
@@ -102,29 +117,30 @@ class Section:
              )
 
         # --- Core document fields ---
-        doc = {
-            "id": self.id,
-            "content": self.split_page.text,
-            "category": self.category,
-            "sourcepage": sourcepage_val,
-             # *** CRITICAL: Use metadata 'sourcefile' if present, else fallback ***
-            "sourcefile": self.metadata.get("sourcefile", self.filename), # Default to filename if no metadata
-             # Add ACLs if they exist on the content object
-            **(getattr(self.content, 'acls', {})), # Use getattr for safety
-             # Add storageUrl if available from URL
-             "storageUrl": self.url if self.url != self.filename else None # Only set if different from filename
-        }
+        # None values are left out as the document is built, so it doesn't need to be filtered afterwards
+        doc: Dict[str, Any] = {"id": self.id, "content": self.split_page.text}
+        if self.category is not None:
+            doc["category"] = self.category
+        doc["sourcepage"] = sourcepage_val
+        # *** CRITICAL: Use metadata 'sourcefile' if present, else fallback ***
+        sourcefile = self.metadata.get("sourcefile", self.filename) # Default to filename if no metadata
+        if sourcefile is not None:
+            doc["sourcefile"] = sourcefile
+        # Add ACLs if they exist on the content object
+        doc.update(self.content.acls)
+        # Add storageUrl if available from URL, only set if different from filename
+        if self.url != self.filename:
+            doc["storageUrl"] = self.url
 
         # --- Merge additional metadata ---
         # Add other fields from metadata, avoiding overwrite of core fields defined above
         # This assumes the index schema might have corresponding fields.
         for key, value in self.metadata.items():
-            if key not in doc and key != "sourcefile": # Avoid overwriting and redundant 'sourcefile'
+            if value is not None and key not in SECTION_CORE_FIELDS and key not in doc:
                 doc[key] = value
                 logger.debug("Added metadata key '%s' to search doc for ID %s", key, self.id)
 
-        # Filter out None values before returning
-        return {k: v for k, v in doc.items() if v is not None}
+        return doc
 
 
 class SearchManager:
@@ -150,6 +166,9 @@ class SearchManager:
         # Integrated vectorization uses the ada-002 model with 1536 dimensions
         self.embedding_dimensions = self.embeddings.open_ai_dimensions if self.embeddings else 1536
         self.search_images = search_images
+        # Shrinks when the service throttles uploads and grows back after sustained success
+        self.upload_batch_size = MAX_UPLOAD_BATCH_SIZE
+        self.upload_successes = 0
 
     async def create_index(self, vectorizers: Optional[List[VectorSearchVectorizer]] = None):
 
@@ -159,7 +178,12 @@ class SearchManager:
 
         async with self.search_info.create_search_index_client() as search_index_client:
 
-            if self.search_info.index_name not in [name async for name in search_index_client.list_index_names()]:
+            try:
+                existing_index: Optional[SearchIndex] = await search_index_client.get_index(self.search_info.index_name)
+            except ResourceNotFoundError:
+                existing_index = None
+
+            if existing_index is None:
                 logger.info("Creating new search index %s", self.search_info.index_name)
                 fields = [
                     (
@@ -313,16 +337,15 @@ class SearchManager:
                 await search_index_client.create_index(index)
             else:
                 logger.info("Search index %s already exists", self.search_info.index_name)
-                existing_index = await search_index_client.get_index(self.search_info.index_name)
 
-                field_exists = any(field.name == "updatedate" for field in existing_index.fields)
-                if not field_exists:
+                existing_field_names = {field.name for field in existing_index.fields}
+                if "updatedate" not in existing_field_names:
                     logger.info("Adding 'updatedate' field to existing index %s", self.search_info.index_name)
                     existing_index.fields.append(
                          SimpleField(name="updatedate", type="Edm.DateTimeOffset", retrievable=True, filterable=True, sortable=True, facetable=True)
                     )
 
-                if not any(field.name == "storageUrl" for field in existing_index.fields):
+                if "storageUrl" not in existing_field_names:
                     logger.info("Adding storageUrl field to index %s", self.search_info.index_name)
                     existing_index.fields.append(
                         SimpleField(
@@ -357,12 +380,128 @@ class SearchManager:
                             self.search_info,
                         )
 
+    async def upload_documents(
+        self, search_client: SearchClient, documents: List[Dict[str, Any]], batch_num: int
+    ) -> List[IndexingResult]:
+        """
+        Uploads documents in requests of at most upload_batch_size documents.
+        When the service throttles a request, the batch size is halved and the rest of the documents are retried after
+        an exponential backoff with jitter.
+        """
+        results: List[IndexingResult] = []
+        start = 0
+        attempt = 0
+        while start < len(documents):
+            chunk = documents[start : start + self.upload_batch_size]
+            try:
+                results.extend(await search_client.upload_documents(documents=chunk))
+            except HttpResponseError as e:
+                if e.status_code not in THROTTLED_STATUS_CODES or attempt >= UPLOAD_MAX_RETRIES:
+                    raise
+                attempt += 1
+                self.upload_batch_size = max(1, len(chunk) // 2)
+                self.upload_successes = 0
+                delay = random.uniform(0, min(UPLOAD_MAX_BACKOFF, UPLOAD_BACKOFF_BASE * 2**attempt))
+                logger.info(
+                    "Search service throttled batch %d (status %s), retrying with %d documents per request in %.1f seconds",
+                    batch_num,
+                    e.status_code,
+                    self.upload_batch_size,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+            start += len(chunk)
+            attempt = 0
+            self.upload_successes += 1
+            if self.upload_successes >= UPLOAD_GROWTH_SUCCESSES and self.upload_batch_size < MAX_UPLOAD_BATCH_SIZE:
+                self.upload_batch_size = min(MAX_UPLOAD_BATCH_SIZE, math.ceil(self.upload_batch_size * 1.1))
+                self.upload_successes = 0
+        return results
+
+    async def upload_section_batch(
+        self,
+        search_client: SearchClient,
+        batch: List[Section],
+        batch_index: int,
+        max_batch_size: int,
+        image_embeddings: Optional[List[List[float]]] = None,
+    ):
+        """Builds the search documents for one batch of sections, embeds them and uploads them."""
+        batch_num = batch_index + 1
+        logger.info("Processing batch %d of %d sections...", batch_num, len(batch))
+        documents: List[Dict[str, Any]] = [] # List to hold final dictionaries for this batch
+
+        # 1. Generate IDs and base search dictionaries using Section method
+        base_documents = []
+        texts_for_embedding = []
+        try:
+            for section_index, section in enumerate(batch):
+                # Generate the unique ID first, unless the caller already numbered the sections of each file
+                if section.id is None:
+                    section.create_section_id(section_index=section_index + batch_index * max_batch_size)
+                # Create the base dictionary using the section's data and metadata
+                base_doc = section.to_search_dict(use_image_sourcepage=(image_embeddings is not None))
+                base_documents.append(base_doc)
+                texts_for_embedding.append(section.split_page.text)
+        except Exception as e:
+            logger.exception("Error creating base search document in batch %d: %s. Skipping batch.", batch_num, e)
+            return # Skip this batch if dict creation fails
+
+        # 2. Calculate Embeddings (if applicable)
+        if self.embeddings and texts_for_embedding:
+            try:
+                logger.debug("Calculating text embeddings for batch %d (%d texts)", batch_num, len(texts_for_embedding))
+                embeddings = await self.embeddings.create_embeddings(texts=texts_for_embedding)
+                if len(embeddings) != len(base_documents):
+                     logger.error("Mismatch between embeddings count (%d) and document count (%d) in batch %d. Skipping embedding assignment.",
+                                  len(embeddings), len(base_documents), batch_num)
+                else:
+                     # Add embeddings to the dictionaries
+                     for i, doc in enumerate(base_documents):
+                         doc["embedding"] = embeddings[i]
+            except Exception as e:
+                 logger.exception("Error calculating text embeddings for batch %d: %s. Documents will be uploaded without embeddings.", batch_num, e)
+
+
+        # 3. Add Image Embeddings (if applicable)
+        if image_embeddings:
+            logger.debug("Assigning image embeddings for batch %d", batch_num)
+            # Need to map page_num from section back to the image_embeddings list index.
+            # Step 1 built one document per section, so batch and base_documents line up.
+            image_embeddings_count = len(image_embeddings)
+            for section, doc in zip(batch, base_documents):
+                page_num = section.split_page.page_num
+                if 0 <= page_num < image_embeddings_count:
+                    doc["imageEmbedding"] = image_embeddings[page_num]
+                else:
+                    logger.warning("Page number %d out of bounds for image embeddings list (length %d) for section ID %s",
+                                   page_num, image_embeddings_count, section.id)
+
+
+        # 4. Upload the prepared documents
+        if base_documents:
+            try:
+                logger.info("Uploading %d documents for batch %d...", len(base_documents), batch_num)
+                results = await self.upload_documents(search_client, base_documents, batch_num)
+                # The service accepts the batch even when some documents fail, so check each result
+                failed_results = [result for result in results if not result.succeeded]
+                for result in failed_results:
+                    logger.error("Failed to upload document %s in batch %d (status %s): %s",
+                                 result.key, batch_num, result.status_code, result.error_message)
+                logger.info("Uploaded batch %d, %d of %d documents succeeded.",
+                            batch_num, len(base_documents) - len(failed_results), len(base_documents))
+            except Exception as e:
+                # Log the error but continue to the next batch if possible
+                logger.exception("Error uploading documents for batch %d: %s", batch_num, e)
+        else:
+             logger.warning("No documents generated for batch %d, skipping upload.", batch_num)
+
     async def update_content(
         self, sections: List[Section], image_embeddings: Optional[List[List[float]]] = None, url: Optional[str] = None # Keep url for potential backward compat or explicit override? Let's ignore it for now as Section handles url.
     ):
         MAX_BATCH_SIZE = 1000
         section_batches = [sections[i : i + MAX_BATCH_SIZE] for i in range(0, len(sections), MAX_BATCH_SIZE)]
-        batch_num = 0
 
 # Example Usage (Conceptual - not part of the class itself)
 # async def main_example():
@@ -390,73 +529,21 @@ class SearchManager:
 
 
         async with self.search_info.create_search_client() as search_client:
-            for batch_index, batch in enumerate(section_batches):
-                batch_num += 1
-                logger.info("Processing batch %d of %d sections...", batch_num, len(batch))
-                documents = [] # List to hold final dictionaries for this batch
-
-                # 1. Generate IDs and base search dictionaries using Section method
-                base_documents = []
-                texts_for_embedding = []
-                try:
-                    for section_index, section in enumerate(batch):
-                        # Generate the unique ID first
-                        section.create_section_id(section_index=section_index + batch_index * MAX_BATCH_SIZE)
-                        # Create the base dictionary using the section's data and metadata
-                        base_doc = section.to_search_dict(use_image_sourcepage=(image_embeddings is not None))
-                        base_documents.append(base_doc)
-                        texts_for_embedding.append(section.split_page.text)
-                except Exception as e:
-                    logger.exception("Error creating base search document in batch %d: %s. Skipping batch.", batch_num, e)
-                    continue # Skip this batch if dict creation fails
-
-                # 2. Calculate Embeddings (if applicable)
-                if self.embeddings and texts_for_embedding:
-                    try:
-                        logger.debug("Calculating text embeddings for batch %d (%d texts)", batch_num, len(texts_for_embedding))
-                        embeddings = await self.embeddings.create_embeddings(texts=texts_for_embedding)
-                        if len(embeddings) != len(base_documents):
-                             logger.error("Mismatch between embeddings count (%d) and document count (%d) in batch %d. Skipping embedding assignment.",
-                                          len(embeddings), len(base_documents), batch_num)
-                        else:
-                             # Add embeddings to the dictionaries
-                             for i, doc in enumerate(base_documents):
-                                 doc["embedding"] = embeddings[i]
-                    except Exception as e:
-                         logger.exception("Error calculating text embeddings for batch %d: %s. Documents will be uploaded without embeddings.", batch_num, e)
-
-
-                # 3. Add Image Embeddings (if applicable)
-                if image_embeddings:
-                    logger.debug("Assigning image embeddings for batch %d", batch_num)
-                    # Need to map page_num from section back to the image_embeddings list index
-                    for i, section in enumerate(batch):
-                        try:
-                            # Check bounds for safety
-                            if 0 <= section.split_page.page_num < len(image_embeddings):
-                                if i < len(base_documents): # Ensure doc exists
-                                     base_documents[i]["imageEmbedding"] = image_embeddings[section.split_page.page_num]
-                            else:
-                                logger.warning("Page number %d out of bounds for image embeddings list (length %d) for section ID %s",
-                                             section.split_page.page_num, len(image_embeddings), base_documents[i].get("id", "N/A"))
-                        except IndexError:
-                             logger.warning("Index error assigning image embedding for page %d (section ID %s)",
-                                          section.split_page.page_num, base_documents[i].get("id", "N/A"))
-                        except Exception as e:
-                            logger.exception("Error assigning image embedding for section ID %s: %s", base_documents[i].get("id", "N/A"), e)
-
-
-                # 4. Upload the prepared documents
-                if base_documents:
-                    try:
-                        logger.info("Uploading %d documents for batch %d...", len(base_documents), batch_num)
-                        await search_client.upload_documents(documents=base_documents)
-                        logger.info("Successfully uploaded batch %d.", batch_num)
-                    except Exception as e:
-                        # Log the error but continue to the next batch if possible
-                        logger.exception("Error uploading documents for batch %d: %s", batch_num, e)
-                else:
-                     logger.warning("No documents generated for batch %d, skipping upload.", batch_num)
+            # Batches run concurrently, so one batch's embedding and upload round-trips don't hold up the next
+            semaphore = asyncio.Semaphore(UPLOAD_BATCH_CONCURRENCY)
+
+            async def upload_batch(batch_index: int, batch: List[Section]):
+                async with semaphore:
+                    await self.upload_section_batch(search_client, batch, batch_index, MAX_BATCH_SIZE, image_embeddings)
+
+            results = await asyncio.gather(
+                *(upload_batch(batch_index, batch) for batch_index, batch in enumerate(section_batches)),
+                return_exceptions=True,
+            )
+            for batch_index, result in enumerate(results):
+                if isinstance(result, Exception):
+                    logger.error("Unexpected error processing batch %d: %s", batch_index + 1, result)
+
         # async with self.search_info.create_search_client() as search_client:
         #     for batch_index, batch in enumerate(section_batches):
         #         documents = [
@@ -499,32 +586,51 @@ class SearchManager:
         logger.info(
             f"Removing sections for path '{path or '<all>'}' using OID filter '{only_oid or '<none>'}' from search index '{self.search_info.index_name}'"
         )
+        filter = None
+        if path is not None:
+            # Replace ' with '' to escape the single quote for the filter
+            # https://learn.microsoft.com/azure/search/query-odata-filter-orderby-syntax#escaping-special-characters-in-string-constants
+            path_for_filter = os.path.basename(path).replace("'", "''")
+            filter = f"sourcefile eq '{path_for_filter}'"
+        max_results = 1000
+        semaphore = asyncio.Semaphore(REMOVE_CONCURRENCY)
+
+        def should_remove(document: Dict[str, Any]) -> bool:
+            # If only_oid is set, only remove documents that have only this oid
+            return not only_oid or document.get("oids") == [only_oid]
+
         async with self.search_info.create_search_client() as search_client:
+
+            async def search_page(skip: int) -> List[str]:
+                async with semaphore:
+                    result = await search_client.search(search_text="", filter=filter, top=max_results, skip=skip)
+                    return [document["id"] async for document in result if should_remove(document)]
+
+            async def delete_batch(ids: List[str]):
+                async with semaphore:
+                    removed_docs = await search_client.delete_documents([{"id": id} for id in ids])
+                    logger.info("Removed %d sections from index", len(removed_docs))
+
             while True:
-                filter = None
-                if path is not None:
-                    # Replace ' with '' to escape the single quote for the filter
-                    # https://learn.microsoft.com/azure/search/query-odata-filter-orderby-syntax#escaping-special-characters-in-string-constants
-                    path_for_filter = os.path.basename(path).replace("'", "''")
-                    filter = f"sourcefile eq '{path_for_filter}'"
-                max_results = 1000
                 result = await search_client.search(
                     search_text="", filter=filter, top=max_results, include_total_count=True
                 )
                 result_count = await result.get_count()
                 if result_count == 0:
                     break
-                documents_to_remove = []
-                async for document in result:
-                    # If only_oid is set, only remove documents that have only this oid
-                    if not only_oid or document.get("oids") == [only_oid]:
-                        documents_to_remove.append({"id": document["id"]})
-                if len(documents_to_remove) == 0:
-                    if result_count < max_results:
-                        break
-                    else:
-                        continue
-                removed_docs = await search_client.delete_documents(documents_to_remove)
-                logger.info("Removed %d sections from index", len(removed_docs))
-                # It can take a few seconds for search results to reflect changes, so wait a bit
+                ids_to_remove = [document["id"] async for document in result if should_remove(document)]
+                # The other pages are fetched concurrently, before anything is deleted so the offsets stay valid
+                skips = range(max_results, min(result_count, MAX_SEARCH_SKIP + 1), max_results)
+                pages = await asyncio.gather(*(search_page(skip) for skip in skips))
+                for page in pages:
+                    ids_to_remove.extend(page)
+                ids_to_remove = list(dict.fromkeys(ids_to_remove))
+                if len(ids_to_remove) == 0:
+                    break
+                batches = [ids_to_remove[i : i + max_results] for i in range(0, len(ids_to_remove), max_results)]
+                await asyncio.gather(*(delete_batch(batch) for batch in batches))
+                if len(ids_to_remove) == result_count:
+                    break
+                # Some matches were out of reach of skip or shifted between pages, search again once the index
+                # reflects the deletions, which can take a few seconds
                 await asyncio.sleep(2)
@@ -1,5 +1,5 @@
 import re
-from typing import IO, AsyncGenerator
+from typing import IO, AsyncGenerator, Optional
 
 from .page import Page
 from .parser import Parser
@@ -23,7 +23,7 @@ def cleanup_data(data: str) -> str:
 class TextParser(Parser):
     """Parses simple text into a Page object."""
 
-    async def parse(self, content: IO) -> AsyncGenerator[Page, None]:
+    async def parse(self, content: IO, file_path: Optional[str] = None) -> AsyncGenerator[Page, None]:
         data = content.read()
         decoded_data = data.decode("utf-8")
         text = cleanup_data(decoded_data)
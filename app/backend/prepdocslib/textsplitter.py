@@ -1,4 +1,6 @@
+import bisect
 import logging
+import re
 from abc import ABC
 from typing import Generator, List
 
@@ -75,26 +77,27 @@ STANDARD_SENTENCE_ENDINGS = [".", "!", "?"]
 # https://www.w3.org/TR/jlreq/#cl-04
 CJK_SENTENCE_ENDINGS = ["。", "！", "？", "‼", "⁇", "⁈", "⁉"]
 
+# Sets, as the boundary searches check every character they pass against these
+SENTENCE_ENDINGS = frozenset(STANDARD_SENTENCE_ENDINGS + CJK_SENTENCE_ENDINGS)
+WORD_BREAKS = frozenset(STANDARD_WORD_BREAKS + CJK_WORD_BREAKS)
+# The boundary searches scan for any of these characters with a regex, which runs in C
+SENTENCE_ENDING_PATTERN = re.compile("[" + re.escape("".join(SENTENCE_ENDINGS)) + "]")
+WORD_BREAK_PATTERN = re.compile("[" + re.escape("".join(WORD_BREAKS)) + "]")
+
 # NB: text-embedding-3-XX is the same BPE as text-embedding-ada-002
 bpe = tiktoken.encoding_for_model(ENCODING_MODEL)
 
 DEFAULT_OVERLAP_PERCENT = 10  # See semantic search article for 10% overlap performance
 DEFAULT_SECTION_LENGTH = 1000  # Roughly 400-500 tokens for English
 
-# --- Tiktoken Initialization ---
-# It's often better to do this setup once if possible,
-# but robust initialization in __init__ is safer.
-try:
-    import tiktoken
-    # We'll get the specific encoding in __init__
-    tiktoken_found = True
-    logger.info("Tiktoken library found.")
-except ImportError:
-    logger.warning("Tiktoken library not found. Please install it (`pip install tiktoken`) for accurate token-based splitting. Falling back to character count heuristics.")
-    tiktoken_found = False
-except Exception as e:
-    logger.error(f"Failed during tiktoken import or initial setup: {e}")
-    tiktoken_found = False # Treat other import errors as if not found
+
+def last_match_start(pattern: "re.Pattern[str]", text: str, start: int, end: int) -> int:
+    """Returns the start of the last match of pattern in text[start:end], or -1 if there is none."""
+    last = -1
+    for match in pattern.finditer(text, start, end):
+        last = match.start()
+    return last
+
 
 class SentenceTextSplitter(TextSplitter):
     """
@@ -102,29 +105,27 @@ class SentenceTextSplitter(TextSplitter):
     """
 
     def __init__(self, max_tokens_per_section: int = 500):
-        self.sentence_endings = STANDARD_SENTENCE_ENDINGS + CJK_SENTENCE_ENDINGS
-        self.word_breaks = STANDARD_WORD_BREAKS + CJK_WORD_BREAKS
+        self.sentence_endings = SENTENCE_ENDINGS
+        self.word_breaks = WORD_BREAKS
+        self.sentence_ending_pattern = SENTENCE_ENDING_PATTERN
+        self.word_break_pattern = WORD_BREAK_PATTERN
         self.max_section_length = DEFAULT_SECTION_LENGTH
         self.sentence_search_limit = 100
         self.max_tokens_per_section = max_tokens_per_section
         self.section_overlap = int(self.max_section_length * DEFAULT_OVERLAP_PERCENT / 100)
-        self.bpe = None # Initialize tokenizer attribute to None
 
     def split_page_by_max_tokens(self, page_num: int, text: str) -> Generator[SplitPage, None, None]:
         """
         Recursively splits page by maximum number of tokens to better handle languages with higher token/word ratios.
-               Fixes len() error on token generator.
         NOTE: Splitting logic is still primarily character-based after the initial check.
         """
         if not text.strip(): # Avoid processing empty strings
              return
 
         try:
-            # --- FIX: Convert token generator to list before len() ---
-            token_generator = bpe.encode(text) # Assume bpe.encode exists and works
-            tokens = list(token_generator) # Convert the generator to a list
-            num_tokens = len(tokens) # Now len() works on the list
-            # --- END FIX ---
+            # encode_ordinary returns a list and treats special-token text like "<|endoftext|>" as plain text,
+            # which encode would reject with an error
+            num_tokens = len(bpe.encode_ordinary(text))
 
             logger.debug("Splitting chunk by tokens: page_num=%d, text_len=%d, num_tokens=%d, max_tokens=%d",
                          page_num, len(text), num_tokens, self.max_tokens_per_section)
@@ -141,25 +142,17 @@ class SentenceTextSplitter(TextSplitter):
                 # will be under the TOKEN limit. A truly token-aware split is harder.
                 logger.debug("Chunk exceeds token limit, attempting character-based split.")
                 start = int(len(text) // 2)
-                pos = 0
                 boundary = int(len(text) // 3) # Outer third boundary
-                split_position = -1
-
-                # Search outwards from center for sentence ending
-                while start - pos > boundary or start + pos < len(text) - boundary: # Adjust loop condition slightly
-                    # Check position before center
-                    if start - pos >= 0 and text[start - pos] in self.sentence_endings:
-                        split_position = start - pos
-                        break
-                    # Check position after center
-                    if start + pos < len(text) and text[start + pos] in self.sentence_endings:
-                        split_position = start + pos
-                        break
-                    pos += 1
-                    # Prevent infinite loop if no sentence ending found in middle third
-                    if start - pos < boundary and start + pos >= len(text) - boundary:
-                        logger.debug("No sentence boundary found in middle third, will perform midpoint split.")
-                        break
+                # Search outwards from center for the nearest sentence ending, preferring the one before the center
+                # on a tie. The search reaches as far as is needed to cover the middle third on both sides.
+                reach = max(start - boundary, len(text) - boundary - start, 0)
+                before = last_match_start(self.sentence_ending_pattern, text, max(0, start - reach + 1), start + 1)
+                after_match = self.sentence_ending_pattern.search(text, start, start + reach)
+                split_position = before
+                if after_match is not None and (before < 0 or after_match.start() - start < start - before):
+                    split_position = after_match.start()
+                if split_position < 0:
+                    logger.debug("No sentence boundary found in middle third, will perform midpoint split.")
 
 
                 if split_position > 0:
@@ -199,12 +192,11 @@ class SentenceTextSplitter(TextSplitter):
 
 
     def split_pages(self, pages: List[Page]) -> Generator[SplitPage, None, None]:
+        page_offsets = [page.offset for page in pages]
+
         def find_page(offset):
-            num_pages = len(pages)
-            for i in range(num_pages - 1):
-                if offset >= pages[i].offset and offset < pages[i + 1].offset:
-                    return pages[i].page_num
-            return pages[num_pages - 1].page_num
+            # Pages are in offset order, so an offset belongs to the last page starting at or before it
+            return pages[bisect.bisect_right(page_offsets, offset) - 1].page_num
 
         all_text = "".join(page.text for page in pages)
         if len(all_text.strip()) == 0:
@@ -225,31 +217,27 @@ class SentenceTextSplitter(TextSplitter):
                 end = length
             else:
                 # Try to find the end of the sentence
-                while (
-                    end < length
-                    and (end - start - self.max_section_length) < self.sentence_search_limit
-                    and all_text[end] not in self.sentence_endings
-                ):
-                    if all_text[end] in self.word_breaks:
-                        last_word = end
-                    end += 1
-                if end < length and all_text[end] not in self.sentence_endings and last_word > 0:
-                    end = last_word  # Fall back to at least keeping a whole word
+                search_end = min(length, end + self.sentence_search_limit)
+                sentence_end = self.sentence_ending_pattern.search(all_text, end, search_end)
+                if sentence_end is not None:
+                    end = sentence_end.start()
+                else:
+                    if search_end < length and all_text[search_end] not in self.sentence_endings:
+                        last_word = last_match_start(self.word_break_pattern, all_text, end, search_end)
+                    # Fall back to at least keeping a whole word
+                    end = last_word if last_word > 0 else search_end
             if end < length:
                 end += 1
 
             # Try to find the start of the sentence or at least a whole word boundary
-            last_word = -1
-            while (
-                start > 0
-                and start > end - self.max_section_length - 2 * self.sentence_search_limit
-                and all_text[start] not in self.sentence_endings
-            ):
-                if all_text[start] in self.word_breaks:
-                    last_word = start
-                start -= 1
-            if all_text[start] not in self.sentence_endings and last_word > 0:
-                start = last_word
+            search_start = max(0, end - self.max_section_length - 2 * self.sentence_search_limit)
+            if start > search_start:
+                sentence_start = last_match_start(self.sentence_ending_pattern, all_text, search_start, start + 1)
+                if sentence_start >= 0:
+                    start = sentence_start
+                else:
+                    first_word = self.word_break_pattern.search(all_text, search_start + 1, start + 1)
+                    start = first_word.start() if first_word is not None else search_start
             if start > 0:
                 start += 1
 
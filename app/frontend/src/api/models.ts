@@ -36,6 +36,7 @@ export type ChatAppRequestOverrides = {
     use_groups_security_filter?: boolean;
     use_gpt4v?: boolean;
     gpt4v_input?: GPT4VInput;
+    include_embedding_preview?: boolean;
     vector_fields: VectorFieldOptions[];
     language: string;
 };
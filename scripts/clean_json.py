@@ -3,8 +3,8 @@
 import os
 import json
 import argparse
+import multiprocessing
 import tempfile
-import shutil
 import sys
 
 # --- Configuration ---
@@ -36,48 +36,37 @@ def process_json_string_file(filepath):
             print(f"  -> Warning: File is empty (skipped): {filepath}")
             return True # Treat as success (nothing to do)
 
-        # 2. First parse: Decode the outer JSON string literal
-        try:
-            # This turns the file content "{\"key\": \"value\"}"
-            # into the Python string '{"key": "value"}'
-            inner_json_string = json.loads(original_content)
-            if not isinstance(inner_json_string, str):
-                 # Handle cases where the file contained valid JSON, but not a *string*
-                 # e.g. if the file was already correctly formatted like { "key": "value" }
-                 # In this scenario, we might still want to re-format it for consistency.
-                 print(f"  -> Info: File does not contain a string literal, attempting direct format.")
-                 # We can try parsing the original content directly as JSON object/array
-                 try:
-                     data = json.loads(original_content) # Try parsing original content directly
-                     # If successful, proceed to formatting step below
-                 except json.JSONDecodeError:
-                      # If direct parsing also fails, then it's neither a valid JSON string nor valid JSON object/array
-                      print(f"  -> Error: File content is neither a valid JSON string literal nor a direct JSON object/array.")
-                      return False
-
-            else:
-                # 3. Second parse: Parse the JSON structure *inside* the decoded string
-                try:
-                    # This turns the Python string '{"key": "value"}'
-                    # into the Python dict {'key': 'value'}
-                    data = json.loads(inner_json_string)
-                except json.JSONDecodeError as e:
-                    print(f"  -> Error: Invalid JSON structure inside the string literal in {filepath}: {e}")
-                    print(f"     -> Inner string preview: {inner_json_string[:200]}...") # Show preview
-                    return False # Failed the second parse
-
-        except json.JSONDecodeError as e:
-            print(f"  -> Error: Could not parse the file content as a JSON string literal in {filepath}: {e}")
-            print(f"     -> Content preview: {original_content[:200]}...") # Show preview
-            # Check if it might already be valid JSON object/array instead of a string
+        # 2. A file holding a JSON string literal starts with a quote, anything else is parsed directly
+        # as JSON that is already decoded, e.g. if the file was already formatted like { "key": "value" }
+        if original_content.lstrip()[:1] == '"':
+            # First parse: decode the outer JSON string literal
+            try:
+                # This turns the file content "{\"key\": \"value\"}"
+                # into the Python string '{"key": "value"}'
+                inner_json_string = json.loads(original_content)
+            except json.JSONDecodeError as e:
+                print(f"  -> Error: Could not parse the file content as a JSON string literal in {filepath}: {e}")
+                print(f"     -> Content preview: {original_content[:200]}...") # Show preview
+                return False
+
+            # 3. Second parse: Parse the JSON structure *inside* the decoded string
+            try:
+                # This turns the Python string '{"key": "value"}'
+                # into the Python dict {'key': 'value'}
+                data = json.loads(inner_json_string)
+            except json.JSONDecodeError as e:
+                print(f"  -> Error: Invalid JSON structure inside the string literal in {filepath}: {e}")
+                print(f"     -> Inner string preview: {inner_json_string[:200]}...") # Show preview
+                return False # Failed the second parse
+        else:
+            # In this scenario, we still want to re-format it for consistency.
+            print(f"  -> Info: File does not contain a string literal, attempting direct format.")
             try:
-                print("     -> Checking if content is already a valid JSON object/array...")
                 data = json.loads(original_content)
-                print("     -> Yes, content is already valid JSON. Proceeding to reformat.")
-                # If this succeeds, 'data' is populated, and we can proceed to formatting
-            except json.JSONDecodeError:
-                 print("     -> No, content is not a valid JSON object/array either.")
-                 return False # Failed the first parse and the fallback check
+            except json.JSONDecodeError as e:
+                print(f"  -> Error: File content is neither a valid JSON string literal nor a direct JSON object/array: {e}")
+                print(f"     -> Content preview: {original_content[:200]}...") # Show preview
+                return False
 
         # 4. Format the final Python object (data)
         # ensure_ascii=False is important for non-ASCII chars
@@ -106,9 +95,9 @@ def process_json_string_file(filepath):
              if temp_path and os.path.exists(temp_path): os.remove(temp_path)
              return False
 
-        # 7. Replace the original file
+        # 7. Replace the original file, the temporary file is in the same directory so this is an atomic rename
         try:
-            shutil.move(temp_path, filepath)
+            os.replace(temp_path, filepath)
             print(f"  -> Formatted and replaced: {filepath}")
             temp_path = None # Prevent deletion in finally
             return True
@@ -138,6 +127,10 @@ def main():
     parser.add_argument(
         "folder_path", help="Path to the folder containing JSON files."
     )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Number of processes that format files in parallel (default: number of CPUs). Use 1 to process files in order."
+    )
     args = parser.parse_args()
 
     folder_path = args.folder_path
@@ -147,19 +140,23 @@ def main():
         exit(1)
 
     print(f"Starting JSON string literal processing in '{folder_path}'...")
-    processed_count = 0
-    success_count = 0
-    error_count = 0
-
-    for root, _, files in os.walk(folder_path):
-        for filename in files:
-            if filename.lower().endswith(".json"):
-                filepath = os.path.join(root, filename)
-                processed_count += 1
-                if process_json_string_file(filepath):
-                     success_count +=1
-                else:
-                    error_count += 1
+    filepaths = [
+        os.path.join(root, filename)
+        for root, _, files in os.walk(folder_path)
+        for filename in files
+        if filename.lower().endswith(".json")
+    ]
+
+    # Files are independent, so they are parsed and formatted in parallel processes
+    if args.workers > 1 and len(filepaths) > 1:
+        with multiprocessing.Pool(min(args.workers, len(filepaths))) as pool:
+            results = list(pool.imap_unordered(process_json_string_file, filepaths, chunksize=16))
+    else:
+        results = [process_json_string_file(filepath) for filepath in filepaths]
+
+    processed_count = len(results)
+    success_count = sum(results)
+    error_count = processed_count - success_count
 
     print("\nProcessing complete.")
     print(f"Total JSON files found: {processed_count}")
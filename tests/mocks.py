@@ -165,6 +165,9 @@ class MockResponse:
     async def text(self):
         return self._text
 
+    async def read(self):
+        return self._text.encode()
+
     async def json(self):
         return json.loads(self._text)
 
@@ -173,6 +176,14 @@ class MockResponse:
             raise Exception(f"HTTP status {self.status}")
 
 
+class MockIndexingResult:
+    def __init__(self, key, succeeded=True, status_code=201, error_message=None):
+        self.key = key
+        self.succeeded = succeeded
+        self.status_code = status_code
+        self.error_message = error_message
+
+
 class MockEmbeddingsClient:
     def __init__(self, create_embedding_response: openai.types.CreateEmbeddingResponse):
         self.create_embedding_response = create_embedding_response
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+from azure.core.credentials import AccessToken
+from azure.core.credentials_async import AsyncTokenCredential
+
+from prepdocslib.cachingtokencredential import CachingTokenCredential
+
+
+class CountingCredential(AsyncTokenCredential):
+    def __init__(self, lifetime: float):
+        self.lifetime = lifetime
+        self.calls = 0
+
+    async def get_token(self, *scopes, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return AccessToken(f"token-{self.calls}", int(time.time() + self.lifetime))
+
+
+@pytest.mark.asyncio
+async def test_caching_token_credential_reuses_token():
+    credential = CountingCredential(lifetime=3600)
+    caching_credential = CachingTokenCredential(credential)
+
+    tokens = await asyncio.gather(
+        *(caching_credential.get_token("https://search.azure.com/.default") for _ in range(5))
+    )
+
+    assert [token.token for token in tokens] == ["token-1"] * 5
+    assert credential.calls == 1
+
+    other_scope_token = await caching_credential.get_token("https://cognitiveservices.azure.com/.default")
+    assert other_scope_token.token == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_caching_token_credential_refreshes_expiring_token():
+    credential = CountingCredential(lifetime=60)
+    caching_credential = CachingTokenCredential(credential)
+
+    await caching_credential.get_token("https://search.azure.com/.default")
+    token = await caching_credential.get_token("https://search.azure.com/.default")
+
+    assert token.token == "token-2"
+    assert credential.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_caching_token_credential_claims_bypass_cache():
+    credential = CountingCredential(lifetime=3600)
+    caching_credential = CachingTokenCredential(credential)
+
+    await caching_credential.get_token("https://search.azure.com/.default")
+    token = await caching_credential.get_token("https://search.azure.com/.default", claims="challenge")
+
+    assert token.token == "token-2"
+
+
+class FailingCredential(CountingCredential):
+    async def get_token(self, *scopes, **kwargs):
+        if "https://storage.azure.com/.default" in scopes:
+            raise ValueError("no access")
+        return await super().get_token(*scopes, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_caching_token_credential_warm(caplog):
+    credential = FailingCredential(lifetime=3600)
+    caching_credential = CachingTokenCredential(credential)
+
+    await caching_credential.warm(["https://search.azure.com/.default", "https://storage.azure.com/.default"])
+    assert "Could not prefetch a token for https://storage.azure.com/.default" in caplog.text
+
+    await caching_credential.get_token("https://search.azure.com/.default")
+    assert credential.calls == 1
@@ -3,6 +3,7 @@ import json
 import pytest
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.aio import SearchClient
+from azure.search.documents.models import VectorizedQuery
 from openai.types.chat import ChatCompletion
 
 from approaches.chatreadretrieveread import ChatReadRetrieveReadApproach
@@ -201,3 +202,114 @@ async def test_search_results_filtering_by_scores(
     assert (
         len(filtered_results) == expected_result_count
     ), f"Expected {expected_result_count} results with minimum_search_score={minimum_search_score} and minimum_reranker_score={minimum_reranker_score}"
+
+
+@pytest.mark.asyncio
+async def test_search_reuses_results_of_similar_query(monkeypatch):
+    chat_approach = ChatReadRetrieveReadApproach(
+        search_client=SearchClient(endpoint="", index_name="", credential=AzureKeyCredential("")),
+        auth_helper=None,
+        openai_client=None,
+        chatgpt_model="gpt-35-turbo",
+        chatgpt_deployment="chat",
+        embedding_deployment="embeddings",
+        embedding_model=MOCK_EMBEDDING_MODEL_NAME,
+        embedding_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        sourcepage_field="",
+        content_field="",
+        sourcefile_field="sourcefile",
+        updatedate_field="",
+        query_language="en-us",
+        query_speller="lexicon",
+        prompt_manager=PromptyManager(),
+    )
+
+    search_texts = []
+
+    async def counting_search(*args, **kwargs):
+        search_texts.append(kwargs.get("search_text"))
+        return await mock_search(*args, **kwargs)
+
+    monkeypatch.setattr(SearchClient, "search", counting_search)
+
+    async def search(query_text, vector, use_text_search):
+        return await chat_approach.search(
+            top=3,
+            query_text=query_text,
+            filter=None,
+            vectors=[VectorizedQuery(vector=vector, k_nearest_neighbors=50, fields="embedding")],
+            use_text_search=use_text_search,
+            use_vector_search=True,
+            use_semantic_ranker=False,
+            use_semantic_captions=False,
+            minimum_search_score=None,
+            minimum_reranker_score=None,
+        )
+
+    # Vector search only: a paraphrase with a nearly identical embedding reuses the cached results
+    first = await search("interest rates", [1.0, 0.0, 0.0], use_text_search=False)
+    second = await search("what are interest rates", [0.99, 0.01, 0.0], use_text_search=False)
+    assert len(search_texts) == 1
+    assert second == first
+
+    # Hybrid search also scores documents against the query text, so only the same text reuses the results
+    await search("interest rates", [1.0, 0.0, 0.0], use_text_search=True)
+    await search("what are interest rates", [0.99, 0.01, 0.0], use_text_search=True)
+    await search("interest rates", [0.99, 0.01, 0.0], use_text_search=True)
+    assert search_texts == ["", "interest rates", "what are interest rates"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "env, expected_search_count",
+    [
+        ({"SEARCH_RESULTS_CACHE_TTL": "0"}, 2),
+        ({"SEARCH_RESULTS_CACHE_THRESHOLD": "0.99999"}, 2),
+        ({"SEARCH_RESULTS_CACHE_THRESHOLD": "0.9"}, 1),
+    ],
+)
+async def test_search_results_cache_settings(monkeypatch, env, expected_search_count):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    chat_approach = ChatReadRetrieveReadApproach(
+        search_client=SearchClient(endpoint="", index_name="", credential=AzureKeyCredential("")),
+        auth_helper=None,
+        openai_client=None,
+        chatgpt_model="gpt-35-turbo",
+        chatgpt_deployment="chat",
+        embedding_deployment="embeddings",
+        embedding_model=MOCK_EMBEDDING_MODEL_NAME,
+        embedding_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        sourcepage_field="",
+        content_field="",
+        sourcefile_field="sourcefile",
+        updatedate_field="",
+        query_language="en-us",
+        query_speller="lexicon",
+        prompt_manager=PromptyManager(),
+    )
+
+    search_count = 0
+
+    async def counting_search(*args, **kwargs):
+        nonlocal search_count
+        search_count += 1
+        return await mock_search(*args, **kwargs)
+
+    monkeypatch.setattr(SearchClient, "search", counting_search)
+
+    for vector in [[1.0, 0.0, 0.0], [0.99, 0.01, 0.0]]:
+        await chat_approach.search(
+            top=3,
+            query_text="interest rates",
+            filter=None,
+            vectors=[VectorizedQuery(vector=vector, k_nearest_neighbors=50, fields="embedding")],
+            use_text_search=False,
+            use_vector_search=True,
+            use_semantic_ranker=False,
+            use_semantic_captions=False,
+            minimum_search_score=None,
+            minimum_reranker_score=None,
+        )
+
+    assert search_count == expected_search_count
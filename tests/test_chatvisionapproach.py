@@ -1,12 +1,18 @@
+import asyncio
 import json
+import time
 
+import jwt
 import pytest
 from azure.search.documents.indexes.models import SearchField, SearchIndex
 from azure.search.documents.models import (
     VectorizedQuery,
 )
+from openai.types import CreateEmbeddingResponse, Embedding
 from openai.types.chat import ChatCompletion
+from openai.types.create_embedding_response import Usage
 
+from approaches.approach import Document, prefetch_pages
 from approaches.chatreadretrievereadvision import ChatReadRetrieveReadVisionApproach
 from approaches.promptmanager import PromptyManager
 from core.authentication import AuthenticationHelper
@@ -73,6 +79,10 @@ def test_build_filter(chat_approach):
     assert result == "category ne 'test_category'"
 
 
+def test_build_filter_no_filters(chat_approach):
+    assert chat_approach.build_filter({}, {}) is None
+
+
 def test_get_search_query(chat_approach):
     payload = """
     {
@@ -150,3 +160,205 @@ async def test_compute_text_embedding(chat_approach, openai_client, mock_openai_
     assert result.vector == [0.0023064255, -0.009327292, -0.0028842222]
     assert result.k_nearest_neighbors == 50
     assert result.fields == "embedding"
+
+
+@pytest.mark.asyncio
+async def test_compute_text_embedding_cached(chat_approach, openai_client, mock_openai_embedding):
+    mock_openai_embedding(openai_client)
+    original_create = openai_client.embeddings.create
+    calls = []
+
+    async def counting_create(*args, **kwargs):
+        calls.append(kwargs["input"])
+        return await original_create(*args, **kwargs)
+
+    openai_client.embeddings.create = counting_create
+
+    first = await chat_approach.compute_text_embedding("test query")
+    second = await chat_approach.compute_text_embedding("test query")
+    await chat_approach.compute_text_embedding("another query")
+
+    assert calls == [["test query"], ["another query"]]
+    assert first.vector == second.vector
+
+
+@pytest.mark.asyncio
+async def test_get_vision_token_cached(chat_approach):
+    tokens = [
+        jwt.encode({"exp": int(time.time()) + 3600}, "secret", algorithm="HS256"),
+        jwt.encode({"exp": int(time.time()) + 30}, "secret", algorithm="HS256"),
+    ]
+    calls = []
+
+    async def token_provider():
+        calls.append(1)
+        return tokens[len(calls) - 1]
+
+    chat_approach.vision_token_provider = token_provider
+
+    assert await chat_approach._get_vision_token() == tokens[0]
+    assert await chat_approach._get_vision_token() == tokens[0]
+    assert len(calls) == 1
+
+    # A token that is about to expire is fetched again on the next call
+    chat_approach._vision_token = None
+    assert await chat_approach._get_vision_token() == tokens[1]
+    tokens.append("not-a-jwt")
+    assert await chat_approach._get_vision_token() == "not-a-jwt"
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("", ""),
+        ("a b.pdf", "a%20b.pdf"),
+        ("https://host/dir/a b.pdf?sv=1&x=2", "https://host/dir/a%20b.pdf?sv=1&x=2"),
+        ("https://host/dir/a.pdf#page=2", "https://host/dir/a.pdf#page=2"),
+        ("https://host/dir/", "https://host/dir/"),
+        ("https://host/dir/a&b.pdf?next=/other", "https://host/dir/a%26b.pdf?next=/other"),
+    ],
+)
+def test_encode_last_url_segment(chat_approach, url, expected):
+    assert chat_approach.encode_last_url_segment(url) == expected
+
+
+@pytest.mark.parametrize(
+    "sourcepage,use_image_citation,expected",
+    [
+        ("Benefit_Options-2.png", False, "Benefit_Options.pdf#page=2"),
+        ("Benefit_Options-2.PNG", False, "Benefit_Options.pdf#page=2"),
+        ("Benefit_Options-2.png", True, "Benefit_Options-2.png"),
+        ("Benefit_Options-2.pdf", False, "Benefit_Options-2.pdf"),
+        ("Northwind-Health-Plus-10.png", False, "Northwind-Health-Plus.pdf#page=10"),
+        ("Benefit_Options-cover.png", False, "Benefit_Options-cover.png"),
+        ("", False, ""),
+    ],
+)
+def test_get_citation(chat_approach, sourcepage, use_image_citation, expected):
+    assert chat_approach.get_citation(sourcepage, use_image_citation) == expected
+
+
+@pytest.mark.asyncio
+async def test_compute_text_embeddings(chat_approach, openai_client):
+    calls = []
+
+    async def mock_create(*args, **kwargs):
+        calls.append(kwargs["input"])
+        return CreateEmbeddingResponse(
+            object="list",
+            data=[Embedding(embedding=[float(i)], index=i, object="embedding") for i, _ in enumerate(kwargs["input"])],
+            model=MOCK_EMBEDDING_MODEL_NAME,
+            usage=Usage(prompt_tokens=8, total_tokens=8),
+        )
+
+    openai_client.embeddings.create = mock_create
+
+    results = await chat_approach.compute_text_embeddings(["first", "second", "first"])
+
+    assert [result.vector for result in results] == [[0.0], [1.0], [0.0]]
+    assert calls == [["first", "second"]]
+
+
+@pytest.mark.asyncio
+async def test_compute_text_and_image_embeddings(chat_approach, openai_client, mock_openai_embedding):
+    mock_openai_embedding(openai_client)
+
+    async def mock_compute_image_embedding(q):
+        return VectorizedQuery(vector=[1.0], k_nearest_neighbors=50, fields="imageEmbedding")
+
+    chat_approach.compute_image_embedding = mock_compute_image_embedding
+
+    results = await chat_approach.compute_text_and_image_embeddings("test query", ["imageEmbedding", "embedding"])
+
+    assert [result.fields for result in results] == ["imageEmbedding", "embedding"]
+
+
+@pytest.mark.parametrize(
+    "include_embedding_preview, expected_embedding, expected_image_embedding",
+    [
+        (False, None, None),
+        (True, "[0.1, 0.2 ...+2 more]", "[0.5]"),
+    ],
+)
+def test_serialize_for_results_embedding_preview(
+    include_embedding_preview, expected_embedding, expected_image_embedding
+):
+    document = Document(
+        id="file-Benefit_Options_PDF-42656E656669745F4F7074696F6E73",
+        content="There is a whistleblower policy.",
+        embedding=[0.1, 0.2, 0.3, 0.4],
+        image_embedding=[0.5],
+        category=None,
+        sourcepage="Benefit_Options-2.pdf",
+        sourcefile="Benefit_Options.pdf",
+    )
+
+    result = document.serialize_for_results(include_embedding_preview=include_embedding_preview)
+
+    assert result["embedding"] == expected_embedding
+    assert result["imageEmbedding"] == expected_image_embedding
+
+
+@pytest.mark.parametrize(
+    "overrides, expected_embedding",
+    [({}, "[0.1, 0.2]"), ({"include_embedding_preview": False}, None)],
+)
+def test_serialize_search_results(chat_approach, overrides, expected_embedding):
+    document = Document(
+        id="doc",
+        content="There is a whistleblower policy.",
+        embedding=[0.1, 0.2],
+        image_embedding=None,
+        category=None,
+        sourcepage="Benefit_Options-2.pdf",
+        sourcefile="Benefit_Options.pdf",
+    )
+
+    results = chat_approach.serialize_search_results([document], overrides)
+
+    assert [result["embedding"] for result in results] == [expected_embedding]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limits_from_env(chat_approach, monkeypatch):
+    monkeypatch.setenv("SEARCH_MAX_CONCURRENCY", "2")
+    monkeypatch.setenv("EMBEDDING_MAX_CONCURRENCY", "3")
+
+    search_semaphore = chat_approach._get_search_semaphore()
+    embedding_semaphore = chat_approach._get_embedding_semaphore()
+
+    assert search_semaphore is chat_approach._get_search_semaphore()
+    for _ in range(2):
+        await search_semaphore.acquire()
+    assert search_semaphore.locked()
+    for _ in range(3):
+        await embedding_semaphore.acquire()
+    assert embedding_semaphore.locked()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_pages():
+    fetched = []
+
+    class MockPages:
+        def __init__(self):
+            self.pages = [["a"], ["b"], ["c"]]
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.pages:
+                raise StopAsyncIteration
+            page = self.pages.pop(0)
+            fetched.append(page)
+            return page
+
+    seen = []
+    async for page in prefetch_pages(MockPages()):
+        # Give the prefetch a chance to run before the page is processed
+        await asyncio.sleep(0)
+        seen.append((page, len(fetched)))
+
+    assert seen == [(["a"], 2), (["b"], 3), (["c"], 3)]
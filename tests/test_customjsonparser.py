@@ -0,0 +1,151 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from prepdocslib import customjsonparser
+from prepdocslib.customjsonparser import SpecificJsonParser, convert_to_iso_utc
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold", [customjsonparser.EXECUTOR_PARSE_THRESHOLD_BYTES, 0])
+@pytest.mark.parametrize("json_loads", [customjsonparser.json_loads, json.loads])
+async def test_specificjsonparser(monkeypatch, threshold, json_loads):
+    monkeypatch.setattr(customjsonparser, "EXECUTOR_PARSE_THRESHOLD_BYTES", threshold)
+    monkeypatch.setattr(customjsonparser, "json_loads", json_loads)
+    file = io.BytesIO(
+        json.dumps(
+            {
+                "value": [
+                    {
+                        "content": "There is a whistleblower policy.",
+                        "url": "https://example.com/Benefit_Options.pdf",
+                        "updatedate": "2024-05-01T10:30:00+02:00",
+                    },
+                    {"content": "   ", "url": "https://example.com/empty.pdf"},
+                    {"content": "No date here.", "url": "https://example.com/Northwind.pdf"},
+                ]
+            }
+        ).encode()
+    )
+    parser = SpecificJsonParser()
+    pages = [page async for page in parser.parse(file, "test.json")]
+    assert len(pages) == 2
+    assert pages[0].page_num == 0
+    assert pages[0].text == "There is a whistleblower policy."
+    assert pages[0].metadata == {
+        "sourcefile": "https://example.com/Benefit_Options.pdf",
+        "updatedate": "2024-05-01T08:30:00Z",
+    }
+    assert pages[1].page_num == 2
+    assert pages[1].metadata == {"sourcefile": "https://example.com/Northwind.pdf"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("json_loads", [customjsonparser.json_loads, json.loads])
+async def test_specificjsonparser_invalid_json(monkeypatch, json_loads):
+    monkeypatch.setattr(customjsonparser, "json_loads", json_loads)
+    parser = SpecificJsonParser()
+    with pytest.raises(ValueError):
+        [page async for page in parser.parse(io.BytesIO(b"{not json"), "test.json")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data",
+    [
+        [{"content": "Top-level list instead of an object."}],
+        {"items": []},
+        {"value": {"content": "Not a list."}},
+        {"value": []},
+        {"value": ["a string item", None, {"content": 42}, {"content": ["a", "list"]}, {"url": "no content"}]},
+    ],
+)
+async def test_specificjsonparser_skips_malformed(data):
+    parser = SpecificJsonParser()
+    pages = [page async for page in parser.parse(io.BytesIO(json.dumps(data).encode()), "test.json")]
+    assert pages == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "updatedate, expected",
+    [
+        ("2024-05-01T10:30:00+02:00", "2024-05-01T08:30:00Z"),
+        ("2024-05-01T10:30:00", "2024-05-01T10:30:00Z"),
+        ("2024-05-01", "2024-05-01T00:00:00Z"),
+        ("May 1, 2024 10:30 AM", "2024-05-01T10:30:00Z"),
+        ("01/05/2024 10:30:00 +0000", "2024-01-05T10:30:00Z"),
+    ],
+)
+async def test_specificjsonparser_updatedate_formats(updatedate, expected):
+    data = {"value": [{"content": "Some text.", "updatedate": updatedate}]}
+    parser = SpecificJsonParser()
+    pages = [page async for page in parser.parse(io.BytesIO(json.dumps(data).encode()), "test.json")]
+    assert pages[0].metadata == {"updatedate": expected}
+
+
+def test_convert_to_iso_utc_cached():
+    convert_to_iso_utc.cache_clear()
+    assert convert_to_iso_utc("2024-05-01T10:30:00+02:00") == "2024-05-01T08:30:00Z"
+    assert convert_to_iso_utc("2024-05-01T10:30:00+02:00") == "2024-05-01T08:30:00Z"
+    assert convert_to_iso_utc.cache_info().hits == 1
+    with pytest.raises(ValueError):
+        convert_to_iso_utc("not a date")
+
+
+def test_release_items():
+    value_list = [{"content": "a"}, {"content": "b"}]
+    assert list(customjsonparser.release_items(value_list)) == [(0, {"content": "a"}), (1, {"content": "b"})]
+    assert value_list == [None, None]
+
+
+def test_remaining_size():
+    content = io.BytesIO(b"0123456789")
+    content.read(4)
+    assert customjsonparser.remaining_size(content) == 6
+    assert content.read() == b"456789"
+
+
+@pytest.mark.asyncio
+async def test_specificjsonparser_yields_to_event_loop(monkeypatch):
+    monkeypatch.setattr(customjsonparser, "ITEMS_PER_EVENT_LOOP_YIELD", 2)
+    data = {"value": [{"content": f"Item {i}"} for i in range(5)]}
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    parser = SpecificJsonParser()
+    pages = [page async for page in parser.parse(io.BytesIO(json.dumps(data).encode()), "test.json")]
+    ticker_task.cancel()
+    assert len(pages) == 5
+    assert ticks >= 3
+
+
+@pytest.mark.asyncio
+async def test_specificjsonparser_streaming(monkeypatch, caplog):
+    pytest.importorskip("ijson")
+    monkeypatch.setattr(customjsonparser, "STREAMING_PARSE_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(customjsonparser, "ITEMS_PER_EVENT_LOOP_YIELD", 2)
+    data = {"value": [{"content": f"Item {i}", "url": f"https://example.com/{i}.pdf"} for i in range(5)]}
+    parser = SpecificJsonParser()
+    pages = [page async for page in parser.parse(io.BytesIO(json.dumps(data).encode()), "test.json")]
+    assert [page.text for page in pages] == [f"Item {i}" for i in range(5)]
+    assert pages[4].page_num == 4
+    assert pages[4].metadata == {"sourcefile": "https://example.com/4.pdf"}
+
+    for data in [{"items": []}, {"value": {"content": "Not a list."}}, {"value": []}]:
+        caplog.clear()
+        pages = [page async for page in parser.parse(io.BytesIO(json.dumps(data).encode()), "test.json")]
+        assert pages == []
+        assert "JSON file 'test.json' has no items in a 'value' list" in caplog.text
+
+    with pytest.raises(ValueError):
+        [page async for page in parser.parse(io.BytesIO(b'{"value": [{"content": '), "test.json")]
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from core.embeddingbatcher import EmbeddingBatcher
+
+
+@pytest.mark.asyncio
+async def test_embeddingbatcher_coalesces_concurrent_requests():
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    batcher = EmbeddingBatcher(embed_batch)
+    results = await asyncio.gather(batcher.embed("a"), batcher.embed("bb"), batcher.embed("a"))
+
+    assert results == [[1.0], [2.0], [1.0]]
+    assert calls == [["a", "bb"]]
+
+
+@pytest.mark.asyncio
+async def test_embeddingbatcher_max_batch_size():
+    calls = []
+
+    async def embed_batch(texts):
+        calls.append(texts)
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(embed_batch, max_batch_size=2)
+    await asyncio.gather(*[batcher.embed(str(i)) for i in range(5)])
+
+    assert calls == [["0", "1"], ["2", "3"], ["4"]]
+
+
+@pytest.mark.asyncio
+async def test_embeddingbatcher_propagates_errors():
+    async def embed_batch(texts):
+        raise ValueError("embedding failed")
+
+    batcher = EmbeddingBatcher(embed_batch)
+    with pytest.raises(ValueError):
+        await batcher.embed("a")
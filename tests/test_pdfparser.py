@@ -1,3 +1,4 @@
+import asyncio
 import io
 import json
 import logging
@@ -181,6 +182,51 @@ async def test_parse_simple(monkeypatch):
     assert pages[0].text == "Page content"
 
 
+@pytest.mark.asyncio
+async def test_parse_max_concurrency(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_begin_analyze_document(self, model_id, analyze_request, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        mock_poller = MagicMock()
+
+        async def mock_poller_result():
+            nonlocal in_flight
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AnalyzeResult(
+                content="Page content",
+                pages=[DocumentPage(page_number=1, spans=[DocumentSpan(offset=0, length=12)])],
+                tables=[],
+                figures=[],
+            )
+
+        mock_poller.result = mock_poller_result
+        return mock_poller
+
+    monkeypatch.setattr(DocumentIntelligenceClient, "begin_analyze_document", mock_begin_analyze_document)
+
+    parser = DocumentAnalysisParser(
+        endpoint="https://example.com",
+        credential=MockAzureCredential(),
+        use_content_understanding=False,
+        max_concurrency=2,
+    )
+
+    async def parse_one(i):
+        content = io.BytesIO(b"pdf content bytes")
+        content.name = f"test{i}.pdf"
+        return [page async for page in parser.parse(content)]
+
+    results = await asyncio.gather(*(parse_one(i) for i in range(5)))
+
+    assert [len(pages) for pages in results] == [1] * 5
+    assert max_in_flight == 2
+
+
 @pytest.mark.asyncio
 async def test_parse_doc_with_tables(monkeypatch):
     mock_poller = MagicMock()
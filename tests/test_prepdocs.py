@@ -126,6 +126,67 @@ async def test_compute_embedding_success(monkeypatch):
     ]
 
 
+class EchoEmbeddingsClient:
+    def __init__(self):
+        self.batch_sizes = []
+
+    async def create(self, *args, **kwargs) -> openai.types.CreateEmbeddingResponse:
+        texts = kwargs["input"] if isinstance(kwargs["input"], list) else [kwargs["input"]]
+        self.batch_sizes.append(len(texts))
+        return openai.types.CreateEmbeddingResponse(
+            object="list",
+            data=[
+                openai.types.Embedding(embedding=[float(len(text))], index=i, object="embedding")
+                for i, text in enumerate(texts)
+            ],
+            model="text-embedding-ada-002",
+            usage=Usage(prompt_tokens=8, total_tokens=8),
+        )
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_batches_keep_input_order(monkeypatch):
+    embeddings_client = EchoEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = OpenAIEmbeddingService(
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        organization="org",
+        disable_batch=False,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    texts = ["x" * (i % 7 + 1) + str(i) for i in range(40)]
+
+    assert await embeddings.create_embeddings(texts=texts) == [[float(len(text))] for text in texts]
+    assert embeddings_client.batch_sizes == [16, 16, 8]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("disable_batch", [False, True])
+async def test_compute_embedding_deduplicates_texts(monkeypatch, disable_batch):
+    embeddings_client = EchoEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = OpenAIEmbeddingService(
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        organization="org",
+        disable_batch=disable_batch,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    texts = ["footer", "page one", "footer", "page two!", "footer"]
+
+    assert await embeddings.create_embeddings(texts=texts) == [[6.0], [8.0], [6.0], [9.0], [6.0]]
+    assert sum(embeddings_client.batch_sizes) == 3
+
+
 def fake_response(http_code):
     return Response(http_code, request=Request(method="get", url="https://foo.bar/"))
 
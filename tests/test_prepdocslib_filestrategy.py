@@ -1,19 +1,28 @@
+import asyncio
+import json
 import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 
 import pytest
+from azure.core.exceptions import ResourceExistsError
 from azure.search.documents.aio import SearchClient
+from azure.storage.blob.aio import BlobClient
 
+from prepdocslib import customjsonparser, filestrategy
 from prepdocslib.blobmanager import BlobManager
+from prepdocslib.customjsonparser import SpecificJsonParser
 from prepdocslib.fileprocessor import FileProcessor
-from prepdocslib.filestrategy import FileStrategy
+from prepdocslib.filestrategy import FileStrategy, parse_file
 from prepdocslib.listfilestrategy import (
     ADLSGen2ListFileStrategy,
+    File,
+    LocalListFileStrategy,
 )
-from prepdocslib.strategy import SearchInfo
+from prepdocslib.strategy import DocumentAction, SearchInfo
 from prepdocslib.textparser import TextParser
-from prepdocslib.textsplitter import SimpleTextSplitter
+from prepdocslib.textsplitter import SentenceTextSplitter, SimpleTextSplitter
 
-from .mocks import MockAzureCredential
+from .mocks import MockAzureCredential, MockIndexingResult
 
 
 @pytest.mark.asyncio
@@ -54,6 +63,7 @@ async def test_file_strategy_adls2(monkeypatch, mock_env, mock_data_lake_service
 
     async def mock_upload_documents(self, documents):
         uploaded_to_search.extend(documents)
+        return [MockIndexingResult(document["id"]) for document in documents]
 
     monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
 
@@ -101,3 +111,297 @@ async def test_file_strategy_adls2(monkeypatch, mock_env, mock_data_lake_service
             "storageUrl": "https://test.blob.core.windows.net/c.txt",
         },
     ]
+
+
+@pytest.mark.asyncio
+async def test_parse_file_with_executor(tmp_path):
+    json_path = tmp_path / "benefits.json"
+    json_path.write_text(
+        json.dumps(
+            {
+                "value": [
+                    {
+                        "content": "There is a whistleblower policy.",
+                        "url": "https://example.com/Benefit_Options.pdf",
+                        "updatedate": "2024-05-01",
+                    }
+                ]
+            }
+        )
+    )
+    file_processors = {".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())}
+
+    with ProcessPoolExecutor(max_workers=1) as executor, open(json_path, "rb") as content:
+        sections = await parse_file(File(content=content), file_processors, executor=executor)
+
+    assert len(sections) == 1
+    assert sections[0].split_page.text == "There is a whistleblower policy."
+    assert sections[0].metadata == {
+        "sourcefile": "https://example.com/Benefit_Options.pdf",
+        "updatedate": "2024-05-01T00:00:00Z",
+    }
+
+
+@pytest.mark.asyncio
+async def test_parse_file_streams_large_json_in_process(monkeypatch, tmp_path):
+    pytest.importorskip("ijson")
+    monkeypatch.setattr(customjsonparser, "STREAMING_PARSE_THRESHOLD_BYTES", 0)
+    json_path = tmp_path / "benefits.json"
+    json_path.write_text(json.dumps({"value": [{"content": "There is a whistleblower policy."}]}))
+    file_processors = {".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())}
+
+    class FailingExecutor(Executor):
+        def submit(self, *args, **kwargs):
+            raise AssertionError("Files that are streamed should not be sent to the process pool")
+
+    with open(json_path, "rb") as content:
+        sections = await parse_file(File(content=content), file_processors, executor=FailingExecutor())
+
+    assert [section.split_page.text for section in sections] == ["There is a whistleblower policy."]
+
+
+@pytest.mark.asyncio
+async def test_file_strategy_max_concurrency(monkeypatch, tmp_path):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.json").write_text(
+            json.dumps({"value": [{"content": f"Content of {name}.", "url": f"https://example.com/{name}.pdf"}]})
+        )
+
+    search_info = SearchInfo(
+        endpoint="https://testsearchclient.blob.core.windows.net",
+        credential=MockAzureCredential(),
+        index_name="test",
+    )
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern=str(tmp_path / "*.json")),
+        blob_manager=None,
+        search_info=search_info,
+        file_processors={".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())},
+        max_concurrency=2,
+    )
+
+    in_flight = 0
+    max_in_flight = 0
+    uploaded = []
+
+    async def mock_parse_file(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return await parse_file(*args, **kwargs)
+
+    async def mock_update_content(sections, image_embeddings=None, url=None):
+        uploaded.extend(section.split_page.text for section in sections)
+
+    monkeypatch.setattr(filestrategy, "parse_file", mock_parse_file)
+    monkeypatch.setattr(file_strategy.search_manager, "update_content", mock_update_content)
+
+    await file_strategy.run()
+
+    assert sorted(uploaded) == ["Content of a.", "Content of b.", "Content of c."]
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_file_strategy_max_concurrency_creates_container_once(monkeypatch, mock_env, tmp_path, caplog):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.json").write_text(json.dumps({"value": [{"content": f"Content of {name}."}]}))
+
+    blob_manager = BlobManager(
+        endpoint=f"https://{os.environ['AZURE_STORAGE_ACCOUNT']}.blob.core.windows.net",
+        credential=MockAzureCredential(),
+        container=os.environ["AZURE_STORAGE_CONTAINER"],
+        account=os.environ["AZURE_STORAGE_ACCOUNT"],
+        resourceGroup=os.environ["AZURE_STORAGE_RESOURCE_GROUP"],
+        subscriptionId=os.environ["AZURE_SUBSCRIPTION_ID"],
+        store_page_images=False,
+    )
+
+    # Every file sees a missing container, like the first run against a fresh storage account
+    container_created = False
+
+    async def mock_exists(*args, **kwargs):
+        await asyncio.sleep(0)
+        return False
+
+    async def mock_create_container(*args, **kwargs):
+        nonlocal container_created
+        if container_created:
+            raise ResourceExistsError("The specified container already exists.")
+        container_created = True
+
+    uploaded_to_blob = []
+
+    async def mock_upload_blob(self, name, *args, **kwargs):
+        uploaded_to_blob.append(name)
+        return BlobClient.from_blob_url(f"https://test.blob.core.windows.net/container/{name}")
+
+    monkeypatch.setattr("azure.storage.blob.aio.ContainerClient.exists", mock_exists)
+    monkeypatch.setattr("azure.storage.blob.aio.ContainerClient.create_container", mock_create_container)
+    monkeypatch.setattr("azure.storage.blob.aio.ContainerClient.upload_blob", mock_upload_blob)
+
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern=str(tmp_path / "*.json")),
+        blob_manager=blob_manager,
+        search_info=SearchInfo(
+            endpoint="https://testsearchclient.blob.core.windows.net",
+            credential=MockAzureCredential(),
+            index_name="test",
+        ),
+        file_processors={".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())},
+        max_concurrency=3,
+    )
+
+    uploaded_to_search = []
+
+    async def mock_update_content(sections, image_embeddings=None, url=None):
+        uploaded_to_search.extend(section.to_search_dict() for section in sections)
+
+    monkeypatch.setattr(file_strategy.search_manager, "update_content", mock_update_content)
+
+    await file_strategy.run()
+
+    assert sorted(uploaded_to_blob) == ["a.json", "b.json", "c.json"]
+    assert sorted(document["sourcefile"] for document in uploaded_to_search) == ["a.json", "b.json", "c.json"]
+    assert "Failed to upload blob" not in caplog.text
+
+
+def test_file_strategy_normalizes_extensions():
+    processor = FileProcessor(SpecificJsonParser(), SentenceTextSplitter())
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern="*.json"),
+        blob_manager=None,
+        search_info=SearchInfo(
+            endpoint="https://testsearchclient.blob.core.windows.net",
+            credential=MockAzureCredential(),
+            index_name="test",
+        ),
+        file_processors={".JSON": processor},
+    )
+    assert file_strategy.file_processors == {".json": processor}
+
+
+@pytest.mark.asyncio
+async def test_file_strategy_remove_max_concurrency(monkeypatch, tmp_path):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.json").write_text("{}")
+
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern=str(tmp_path / "*.json")),
+        blob_manager=None,
+        search_info=SearchInfo(
+            endpoint="https://testsearchclient.blob.core.windows.net",
+            credential=MockAzureCredential(),
+            index_name="test",
+        ),
+        file_processors={},
+        document_action=DocumentAction.Remove,
+        max_concurrency=2,
+    )
+
+    in_flight = 0
+    max_in_flight = 0
+    removed = []
+
+    async def mock_remove_content(path=None, only_oid=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        removed.append(os.path.basename(path))
+        in_flight -= 1
+
+    monkeypatch.setattr(file_strategy.search_manager, "remove_content", mock_remove_content)
+
+    await file_strategy.run()
+
+    assert sorted(removed) == ["a.json", "b.json", "c.json"]
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_file_strategy_batches_uploads(monkeypatch, tmp_path):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.json").write_text(
+            json.dumps({"value": [{"content": f"Content of {name}.", "url": f"https://example.com/{name}.pdf"}]})
+        )
+    monkeypatch.setattr(filestrategy, "SECTION_UPLOAD_BATCH_SIZE", 2)
+
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern=str(tmp_path / "*.json")),
+        blob_manager=None,
+        search_info=SearchInfo(
+            endpoint="https://testsearchclient.blob.core.windows.net",
+            credential=MockAzureCredential(),
+            index_name="test",
+        ),
+        file_processors={".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())},
+    )
+
+    batches = []
+
+    async def mock_update_content(sections, image_embeddings=None, url=None):
+        batches.append(sections)
+
+    monkeypatch.setattr(file_strategy.search_manager, "update_content", mock_update_content)
+
+    await file_strategy.run()
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    # Sections are numbered within their own file, not within the upload batch
+    sections = [section for batch in batches for section in batch]
+    assert sorted(section.id for section in sections) == sorted(
+        section.create_section_id(section_index=0) for section in sections
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing_batch, expected_failed", [(0, ["a.json", "b.json"]), (1, ["c.json"])])
+async def test_file_strategy_batch_upload_failure(monkeypatch, tmp_path, caplog, failing_batch, expected_failed):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.json").write_text(json.dumps({"value": [{"content": f"Content of {name}."}]}))
+    monkeypatch.setattr(filestrategy, "SECTION_UPLOAD_BATCH_SIZE", 2)
+
+    file_strategy = FileStrategy(
+        list_file_strategy=LocalListFileStrategy(path_pattern=str(tmp_path / "*.json")),
+        blob_manager=None,
+        search_info=SearchInfo(
+            endpoint="https://testsearchclient.blob.core.windows.net",
+            credential=MockAzureCredential(),
+            index_name="test",
+        ),
+        file_processors={".json": FileProcessor(SpecificJsonParser(), SentenceTextSplitter())},
+    )
+
+    batch_count = 0
+    fail_uploads = True
+
+    async def mock_update_content(sections, image_embeddings=None, url=None):
+        nonlocal batch_count
+        batch_count += 1
+        if fail_uploads and batch_count - 1 == failing_batch:
+            raise ValueError("upload failed")
+
+    monkeypatch.setattr(file_strategy.search_manager, "update_content", mock_update_content)
+
+    # The last batch is uploaded after all files finished, a failure there must not abort the run either
+    with caplog.at_level("INFO"):
+        await file_strategy.run()
+
+    assert sorted(file_strategy.failed_upload_files) == expected_failed
+    assert (
+        f"Processed: {3 - len(expected_failed)}, Failed/Skipped: {len(expected_failed)}, Total Files: 3" in caplog.text
+    )
+
+    # Failures of an earlier run aren't counted again, the files' .md5 records are removed so they are listed again
+    for md5_path in tmp_path.glob("*.md5"):
+        md5_path.unlink()
+    caplog.clear()
+    fail_uploads = False
+    with caplog.at_level("INFO"):
+        await file_strategy.run()
+
+    assert file_strategy.failed_upload_files == []
+    assert "Processed: 3, Failed/Skipped: 0, Total Files: 3" in caplog.text
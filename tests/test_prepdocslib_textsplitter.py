@@ -31,6 +31,13 @@ def test_sentencetextsplitter_split_small_pages():
     assert split_pages[0].text == "Not a large page"
 
 
+def test_sentencetextsplitter_special_token_text():
+    t = SentenceTextSplitter()
+
+    split_pages = list(t.split_pages(pages=[Page(page_num=0, offset=0, text="End of a chat <|endoftext|>")]))
+    assert [split_page.text for split_page in split_pages] == ["End of a chat <|endoftext|>"]
+
+
 @pytest.mark.asyncio
 async def test_sentencetextsplitter_list_parse_and_split(tmp_path, snapshot):
     text_splitter = SentenceTextSplitter()
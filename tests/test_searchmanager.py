@@ -1,9 +1,11 @@
+import asyncio
 import io
 
 import openai
 import openai.types
 import pytest
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
 from azure.search.documents.aio import SearchClient
 from azure.search.documents.indexes.aio import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -13,6 +15,7 @@ from azure.search.documents.indexes.models import (
 )
 from openai.types.create_embedding_response import Usage
 
+from prepdocslib import searchmanager
 from prepdocslib.embeddings import AzureOpenAIEmbeddingService
 from prepdocslib.listfilestrategy import File
 from prepdocslib.searchmanager import SearchManager, Section
@@ -24,6 +27,7 @@ from .mocks import (
     MOCK_EMBEDDING_MODEL_NAME,
     MockClient,
     MockEmbeddingsClient,
+    MockIndexingResult,
 )
 
 
@@ -43,12 +47,11 @@ async def test_create_index_doesnt_exist_yet(monkeypatch, search_info):
     async def mock_create_index(self, index):
         indexes.append(index)
 
-    async def mock_list_index_names(self):
-        for index in []:
-            yield index
+    async def mock_get_index(self, *args, **kwargs):
+        raise ResourceNotFoundError("No such index")
 
     monkeypatch.setattr(SearchIndexClient, "create_index", mock_create_index)
-    monkeypatch.setattr(SearchIndexClient, "list_index_names", mock_list_index_names)
+    monkeypatch.setattr(SearchIndexClient, "get_index", mock_get_index)
 
     manager = SearchManager(search_info)
     await manager.create_index()
@@ -64,12 +67,11 @@ async def test_create_index_using_int_vectorization(monkeypatch, search_info):
     async def mock_create_index(self, index):
         indexes.append(index)
 
-    async def mock_list_index_names(self):
-        for index in []:
-            yield index
+    async def mock_get_index(self, *args, **kwargs):
+        raise ResourceNotFoundError("No such index")
 
     monkeypatch.setattr(SearchIndexClient, "create_index", mock_create_index)
-    monkeypatch.setattr(SearchIndexClient, "list_index_names", mock_list_index_names)
+    monkeypatch.setattr(SearchIndexClient, "get_index", mock_get_index)
 
     manager = SearchManager(search_info, use_int_vectorization=True)
     await manager.create_index()
@@ -86,9 +88,6 @@ async def test_create_index_does_exist(monkeypatch, search_info):
     async def mock_create_index(self, index):
         created_indexes.append(index)
 
-    async def mock_list_index_names(self):
-        yield "test"
-
     async def mock_get_index(self, *args, **kwargs):
         return SearchIndex(
             name="test",
@@ -105,7 +104,6 @@ async def test_create_index_does_exist(monkeypatch, search_info):
         updated_indexes.append(index)
 
     monkeypatch.setattr(SearchIndexClient, "create_index", mock_create_index)
-    monkeypatch.setattr(SearchIndexClient, "list_index_names", mock_list_index_names)
     monkeypatch.setattr(SearchIndexClient, "get_index", mock_get_index)
     monkeypatch.setattr(SearchIndexClient, "create_or_update_index", mock_create_or_update_index)
 
@@ -123,9 +121,6 @@ async def test_create_index_add_field(monkeypatch, search_info):
     async def mock_create_index(self, index):
         created_indexes.append(index)
 
-    async def mock_list_index_names(self):
-        yield "test"
-
     async def mock_get_index(self, *args, **kwargs):
         return SearchIndex(
             name="test",
@@ -136,7 +131,6 @@ async def test_create_index_add_field(monkeypatch, search_info):
         updated_indexes.append(index)
 
     monkeypatch.setattr(SearchIndexClient, "create_index", mock_create_index)
-    monkeypatch.setattr(SearchIndexClient, "list_index_names", mock_list_index_names)
     monkeypatch.setattr(SearchIndexClient, "get_index", mock_get_index)
     monkeypatch.setattr(SearchIndexClient, "create_or_update_index", mock_create_or_update_index)
 
@@ -155,12 +149,11 @@ async def test_create_index_acls(monkeypatch, search_info):
     async def mock_create_index(self, index):
         indexes.append(index)
 
-    async def mock_list_index_names(self):
-        for index in []:
-            yield index
+    async def mock_get_index(self, *args, **kwargs):
+        raise ResourceNotFoundError("No such index")
 
     monkeypatch.setattr(SearchIndexClient, "create_index", mock_create_index)
-    monkeypatch.setattr(SearchIndexClient, "list_index_names", mock_list_index_names)
+    monkeypatch.setattr(SearchIndexClient, "get_index", mock_get_index)
 
     manager = SearchManager(
         search_info,
@@ -181,6 +174,7 @@ async def test_update_content(monkeypatch, search_info):
         assert documents[0]["category"] == "test"
         assert documents[0]["sourcepage"] == "foo.pdf#page=1"
         assert documents[0]["sourcefile"] == "foo.pdf"
+        return [MockIndexingResult(document["id"]) for document in documents]
 
     monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
 
@@ -210,6 +204,7 @@ async def test_update_content_many(monkeypatch, search_info):
 
     async def mock_upload_documents(self, documents):
         ids.extend([doc["id"] for doc in documents])
+        return [MockIndexingResult(doc["id"]) for doc in documents]
 
     monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
 
@@ -239,6 +234,114 @@ async def test_update_content_many(monkeypatch, search_info):
     assert len(set(ids)) == 1500, "Document ids are not unique"
 
 
+@pytest.mark.asyncio
+async def test_update_content_uploads_batches_concurrently(monkeypatch, search_info):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_upload_documents(self, documents):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [MockIndexingResult(doc["id"]) for doc in documents]
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+    monkeypatch.setattr(searchmanager, "UPLOAD_BATCH_CONCURRENCY", 2)
+
+    manager = SearchManager(search_info)
+    test_io = io.BytesIO(b"test page")
+    test_io.name = "test/foo.pdf"
+    file = File(test_io)
+    sections = [Section(split_page=SplitPage(page_num=0, text=f"section {i}"), content=file) for i in range(4000)]
+
+    await manager.update_content(sections)
+
+    assert max_in_flight == 2
+
+
+def http_response_error(status_code):
+    error = HttpResponseError(message=f"Status {status_code}")
+    error.status_code = status_code
+    return error
+
+
+@pytest.mark.asyncio
+async def test_update_content_retries_throttled_uploads(monkeypatch, search_info):
+    request_sizes = []
+    ids = []
+
+    async def mock_upload_documents(self, documents):
+        request_sizes.append(len(documents))
+        if len(request_sizes) == 1:
+            raise http_response_error(503)
+        ids.extend(doc["id"] for doc in documents)
+        return [MockIndexingResult(doc["id"]) for doc in documents]
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+    monkeypatch.setattr(searchmanager, "UPLOAD_BACKOFF_BASE", 0)
+    monkeypatch.setattr(searchmanager, "UPLOAD_GROWTH_SUCCESSES", 1)
+
+    manager = SearchManager(search_info)
+    test_io = io.BytesIO(b"test page")
+    test_io.name = "test/foo.pdf"
+    file = File(test_io)
+    sections = [Section(split_page=SplitPage(page_num=0, text=f"section {i}"), content=file) for i in range(10)]
+
+    await manager.update_content(sections)
+
+    assert request_sizes == [10, 5, 5]
+    assert len(set(ids)) == 10
+    assert manager.upload_batch_size == 7
+
+
+@pytest.mark.asyncio
+async def test_update_content_gives_up_on_other_errors(monkeypatch, search_info, caplog):
+    calls = 0
+
+    async def mock_upload_documents(self, documents):
+        nonlocal calls
+        calls += 1
+        raise http_response_error(400)
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+
+    manager = SearchManager(search_info)
+    test_io = io.BytesIO(b"test page")
+    test_io.name = "test/foo.pdf"
+    await manager.update_content([Section(split_page=SplitPage(page_num=0, text="text"), content=File(test_io))])
+
+    assert calls == 1
+    assert "Error uploading documents for batch 1" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_update_content_keeps_section_ids(monkeypatch, search_info):
+    ids = []
+
+    async def mock_upload_documents(self, documents):
+        ids.extend([doc["id"] for doc in documents])
+        return [MockIndexingResult(doc["id"]) for doc in documents]
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+
+    manager = SearchManager(search_info)
+
+    sections = []
+    for filename in ["foo.pdf", "bar.pdf"]:
+        test_io = io.BytesIO(b"test page")
+        test_io.name = f"test/{filename}"
+        section = Section(split_page=SplitPage(page_num=0, text="test section"), content=File(test_io))
+        section.create_section_id(section_index=0)
+        sections.append(section)
+    expected_ids = [section.id for section in sections]
+
+    await manager.update_content(sections)
+
+    assert ids == expected_ids
+
+
 @pytest.mark.asyncio
 async def test_update_content_with_embeddings(monkeypatch, search_info):
     async def mock_create_client(*args, **kwargs):
@@ -268,6 +371,7 @@ async def test_update_content_with_embeddings(monkeypatch, search_info):
 
     async def mock_upload_documents(self, documents):
         documents_uploaded.extend(documents)
+        return [MockIndexingResult(document["id"]) for document in documents]
 
     monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
     embeddings = AzureOpenAIEmbeddingService(
@@ -311,8 +415,9 @@ async def test_update_content_with_embeddings(monkeypatch, search_info):
 
 
 class AsyncSearchResultsIterator:
-    def __init__(self, results):
+    def __init__(self, results, count=None):
         self.results = results
+        self.count = count
 
     def __aiter__(self):
         return self
@@ -323,7 +428,7 @@ class AsyncSearchResultsIterator:
         return self.results.pop()
 
     async def get_count(self):
-        return len(self.results)
+        return len(self.results) if self.count is None else self.count
 
 
 @pytest.mark.asyncio
@@ -362,12 +467,39 @@ async def test_remove_content(monkeypatch, search_info):
 
     await manager.remove_content("foo's bar.pdf")
 
-    assert len(searched_filters) == 2, "It should have searched twice (with no results on second try)"
+    assert len(searched_filters) == 1, "It should have searched once, all matches were removed"
     assert searched_filters[0] == "sourcefile eq 'foo''s bar.pdf'"
     assert len(deleted_documents) == 1, "It should have deleted one document"
     assert deleted_documents[0]["id"] == "file-foo_pdf-666F6F2E706466-page-0"
 
 
+@pytest.mark.asyncio
+async def test_remove_content_pages(monkeypatch, search_info):
+    index = {f"doc-{i}": {"id": f"doc-{i}", "sourcefile": "foo.pdf"} for i in range(2500)}
+    searched_skips = []
+    delete_sizes = []
+
+    async def mock_search(self, *args, top, skip=0, **kwargs):
+        searched_skips.append(skip)
+        return AsyncSearchResultsIterator(list(index.values())[skip : skip + top], count=len(index))
+
+    async def mock_delete_documents(self, documents):
+        delete_sizes.append(len(documents))
+        for document in documents:
+            del index[document["id"]]
+        return documents
+
+    monkeypatch.setattr(SearchClient, "search", mock_search)
+    monkeypatch.setattr(SearchClient, "delete_documents", mock_delete_documents)
+
+    manager = SearchManager(search_info)
+    await manager.remove_content("foo.pdf")
+
+    assert sorted(searched_skips) == [0, 1000, 2000]
+    assert sorted(delete_sizes) == [500, 1000, 1000]
+    assert index == {}
+
+
 @pytest.mark.asyncio
 async def test_remove_content_no_docs(monkeypatch, search_info):
 
@@ -490,3 +622,48 @@ async def test_remove_content_no_inf_loop(monkeypatch, search_info):
     assert len(searched_filters) == 1, "It should have searched once"
     assert searched_filters[0] == "sourcefile eq 'foo.pdf'"
     assert len(deleted_documents) == 0, "It should have deleted no documents"
+
+
+@pytest.mark.asyncio
+async def test_update_content_logs_failed_documents(monkeypatch, search_info, caplog):
+    async def mock_upload_documents(self, documents):
+        return [MockIndexingResult(documents[0]["id"], succeeded=False, status_code=400, error_message="Bad date")]
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+
+    manager = SearchManager(search_info)
+    test_io = io.BytesIO(b"test content")
+    test_io.name = "test/foo.pdf"
+    section = Section(split_page=SplitPage(page_num=0, text="test content"), content=File(test_io))
+
+    await manager.update_content([section])
+
+    assert f"Failed to upload document {section.id} in batch 1 (status 400): Bad date" in caplog.text
+    assert "Uploaded batch 1, 0 of 1 documents succeeded." in caplog.text
+
+
+def test_section_to_search_dict():
+    test_io = io.BytesIO(b"test content")
+    test_io.name = "test/foo.pdf"
+    file = File(test_io, acls={"oids": ["oid1"], "groups": []}, url="https://example.com/foo.pdf")
+    section = Section(split_page=SplitPage(page_num=0, text="test content"), content=file)
+    section.metadata = {
+        "sourcefile": "https://example.com/original.pdf",
+        "updatedate": "2024-05-01T08:30:00Z",
+        "content": "should not replace the content",
+        "category": "should not be set either",
+        "oids": ["should not replace the ACLs"],
+        "empty": None,
+    }
+    section.create_section_id(0)
+
+    assert section.to_search_dict() == {
+        "id": section.id,
+        "content": "test content",
+        "sourcepage": "foo.pdf#page=1",
+        "sourcefile": "https://example.com/original.pdf",
+        "oids": ["oid1"],
+        "groups": [],
+        "storageUrl": "https://example.com/foo.pdf",
+        "updatedate": "2024-05-01T08:30:00Z",
+    }
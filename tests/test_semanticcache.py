@@ -0,0 +1,46 @@
+from core.semanticcache import SemanticCache, within_squared_distance
+
+
+def test_semanticcache_similar_vector_hit():
+    cache: SemanticCache[str] = SemanticCache(threshold=0.95)
+    cache.set("scope", [1.0, 0.0, 0.0], "value")
+
+    assert cache.get("scope", [0.99, 0.01, 0.0]) == "value"
+    assert cache.get("scope", [0.0, 1.0, 0.0]) is None
+
+
+def test_semanticcache_scope_mismatch():
+    cache: SemanticCache[str] = SemanticCache()
+    cache.set("scope", [1.0, 0.0], "value")
+
+    assert cache.get("other-scope", [1.0, 0.0]) is None
+
+
+def test_semanticcache_ttl_expired(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("core.semanticcache.time.monotonic", lambda: now)
+    cache: SemanticCache[str] = SemanticCache(ttl_seconds=10)
+    cache.set("scope", [1.0, 0.0], "value")
+
+    now = 1011.0
+    assert cache.get("scope", [1.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+def test_semanticcache_evicts_least_recently_used():
+    cache: SemanticCache[str] = SemanticCache(max_entries=2)
+    cache.set("scope", [1.0, 0.0, 0.0], "first")
+    cache.set("scope", [0.0, 1.0, 0.0], "second")
+    assert cache.get("scope", [1.0, 0.0, 0.0]) == "first"
+    cache.set("scope", [0.0, 0.0, 1.0], "third")
+
+    assert cache.get("scope", [0.0, 1.0, 0.0]) is None
+    assert cache.get("scope", [1.0, 0.0, 0.0]) == "first"
+    assert len(cache) == 2
+
+
+def test_within_squared_distance():
+    vector = [0.5] * 200
+    assert within_squared_distance(vector, vector, 0.0)
+    assert within_squared_distance(vector, [0.5] * 199 + [0.8], 0.1)
+    assert not within_squared_distance(vector, [0.9] + [0.5] * 199, 0.1)
@@ -15,7 +15,7 @@ from quart.datastructures import FileStorage
 
 from prepdocslib.embeddings import AzureOpenAIEmbeddingService
 
-from .mocks import MockClient, MockEmbeddingsClient
+from .mocks import MockClient, MockEmbeddingsClient, MockIndexingResult
 
 
 # parameterize for directory existing or not
@@ -85,6 +85,7 @@ async def test_upload_file(auth_client, monkeypatch, mock_data_lake_service_clie
 
     async def mock_upload_documents(self, documents):
         documents_uploaded.extend(documents)
+        return [MockIndexingResult(document["id"]) for document in documents]
 
     monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
     monkeypatch.setattr(AzureOpenAIEmbeddingService, "create_client", mock_create_client)